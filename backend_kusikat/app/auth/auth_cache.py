@@ -0,0 +1,128 @@
+# app/auth/auth_cache.py
+"""
+Cache autentikasi untuk get_current_user.
+
+Dashboard mem-polling beberapa endpoint tiap 5 detik per tab; tanpa cache setiap
+request melakukan jwt.decode + SELECT users yang sama. Di sini disimpan:
+- token -> claims hasil decode (tidak pernah melewati `exp` token)
+- user id -> snapshot kolom user (read-only), TTL pendek
+
+Snapshot wajib di-invalidate oleh endpoint yang mengubah data user
+(update_phone, update_username, set_password, change_password, reset_password).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", 300))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 4096))
+
+
+class UserSnapshot:
+    """Salinan kolom baris `users` yang tidak terikat session (jangan dimodifikasi)."""
+
+    def __init__(self, **columns):
+        self.__dict__.update(columns)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot read-only; muat ulang User dari database untuk update")
+
+    @classmethod
+    def from_orm(cls, user) -> "UserSnapshot":
+        return cls(**{column.key: getattr(user, column.key) for column in user.__table__.columns})
+
+
+class _TTLCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+class AuthCache:
+    def __init__(self, token_ttl: float = AUTH_TOKEN_CACHE_TTL, user_ttl: float = AUTH_USER_CACHE_TTL,
+                 max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.token_ttl = token_ttl
+        self.user_ttl = user_ttl
+        self.tokens = _TTLCache(max_entries)
+        self.users = _TTLCache(max_entries)
+        self.invalidations = 0
+
+    def claims(self, token: str, decode: Callable[[str], dict]) -> dict:
+        """Claims token dari cache, atau `decode(token)` (yang memvalidasi & bisa melempar 401)."""
+        payload = self.tokens.get(token)
+        if payload is None:
+            payload = decode(token)
+            expires_at = time.time() + self.token_ttl
+            exp = payload.get("exp")
+            if isinstance(exp, (int, float)):
+                expires_at = min(expires_at, exp)
+            self.tokens.put(token, payload, expires_at)
+        return payload
+
+    def user(self, user_id: int, load: Callable[[int], object]) -> Optional[UserSnapshot]:
+        """Snapshot user dari cache, atau dari `load(user_id)` (ORM User / None)."""
+        snapshot = self.users.get(user_id)
+        if snapshot is None:
+            user = load(user_id)
+            if user is None:
+                return None
+            snapshot = UserSnapshot.from_orm(user)
+            self.users.put(user_id, snapshot, time.time() + self.user_ttl)
+        return snapshot
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.users.pop(user_id)
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.tokens.stats(),
+            "users": self.users.stats(),
+            "invalidations": self.invalidations,
+        }
+
+
+auth_cache = AuthCache()
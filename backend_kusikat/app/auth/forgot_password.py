@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import random, string
-from passlib.context import CryptContext
 
+from app.auth.auth_cache import auth_cache
+from app.auth.passwords import password_hasher
 from app.database import SessionLocal
 from app.models import User, PasswordResetToken
 from app.schemas import ForgotPasswordRequest, VerifyOTPRequest, ResetPasswordRequest
@@ -17,11 +19,6 @@ router = APIRouter(tags=["Forgot Password"])
 # ------------------------------------
 # Utility
 # ------------------------------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str):
-    return pwd_context.hash(password)
-
 def get_db():
     db = SessionLocal()
     try:
@@ -75,8 +72,7 @@ def verify_otp(request: VerifyOTPRequest, db: Session = Depends(get_db)):
 # ------------------------------------
 # Forgot Password Step 3: Reset Password
 # ------------------------------------
-@router.post("/reset-password")
-def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+def _find_reset_target(db: Session, request: ResetPasswordRequest):
     token = db.query(PasswordResetToken).filter(
         PasswordResetToken.email == request.email,
         PasswordResetToken.otp == request.otp
@@ -91,13 +87,23 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db))
     user = db.query(User).filter(User.email == request.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    return token, user
 
-    # 🔒 Penting: hash password sebelum disimpan
-    user.password = hash_password(request.new_password)
+def _apply_reset(db: Session, token: PasswordResetToken, user: User, hashed_password: str) -> None:
+    user.password = hashed_password
     db.commit()
+    auth_cache.invalidate_user(user.id)
 
     # (Opsional) hapus token setelah berhasil reset
     db.delete(token)
     db.commit()
 
+@router.post("/reset-password")
+async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+    token, user = await run_in_threadpool(_find_reset_target, db, request)
+
+    # 🔒 Penting: hash password sebelum disimpan (pbkdf2, di proses hasher)
+    hashed_password = await password_hasher.hash(request.new_password)
+    await run_in_threadpool(_apply_reset, db, token, user, hashed_password)
+
     return {"message": "Password berhasil direset"}
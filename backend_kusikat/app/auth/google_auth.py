@@ -1,10 +1,8 @@
 # app/auth/google_auth.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-import requests
 from urllib.parse import urlencode
 from datetime import timedelta
 import os
@@ -13,13 +11,13 @@ from dotenv import load_dotenv
 from app.database import SessionLocal
 from app.models import User
 from app.auth.jwt_handler import create_access_token
+from app.auth.auth_cache import auth_cache
+from app.auth.google_oauth import GOOGLE_CLIENT_ID, exchange_code, verify_id_token
 
 load_dotenv()
 
 router = APIRouter(prefix="/google", tags=["Google OAuth"])
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("REDIRECT_URI")  # Harus: http://localhost:8000/auth/google/callback
 FRONTEND_URL = os.getenv("FRONTEND_URL")  # Harus: http://localhost:5173
 
@@ -43,8 +41,23 @@ def google_login():
     google_auth_url = f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
     return RedirectResponse(url=google_auth_url)
 
+def _find_or_create_user(db: Session, google_id: str, email: str, username: str) -> dict:
+    user = db.query(User).filter(User.google_id == google_id).first()
+    if not user:
+        user = db.query(User).filter(User.email == email).first()
+        if user:
+            user.google_id = google_id
+            user.username = username
+        else:
+            user = User(username=username, email=email, google_id=google_id)
+            db.add(user)
+        db.commit()
+        db.refresh(user)
+        auth_cache.invalidate_user(user.id)
+    return {"id": user.id, "email": user.email}
+
 @router.get("/callback")
-def google_callback(
+async def google_callback(
     code: str | None = None,
     error: str | None = None,
     db: Session = Depends(get_db)
@@ -63,24 +76,11 @@ def google_callback(
         )
 
     try:
-        # ✅ Tukar authorization code dengan access token
-        token_url = "https://oauth2.googleapis.com/token"
-        token_data = {
-            "client_id": GOOGLE_CLIENT_ID,
-            "client_secret": GOOGLE_CLIENT_SECRET,
-            "code": code,
-            "grant_type": "authorization_code",
-            "redirect_uri": REDIRECT_URI,
-        }
-
-        token_res = requests.post(token_url, data=token_data)
-        token_res.raise_for_status()
-        tokens = token_res.json()
-
-        # ✅ Verifikasi ID token Google
-        idinfo = id_token.verify_oauth2_token(
-            tokens["id_token"], google_requests.Request(), GOOGLE_CLIENT_ID
-        )
+        # ✅ Tukar authorization code dengan access token (klien httpx bersama, ada timeout)
+        tokens = await exchange_code(code, REDIRECT_URI)
+
+        # ✅ Verifikasi ID token Google (sertifikat dari cache, tanpa request ke Google)
+        idinfo = await verify_id_token(tokens["id_token"], GOOGLE_CLIENT_ID)
 
         google_id = idinfo["sub"]
         email = idinfo["email"]
@@ -88,21 +88,11 @@ def google_callback(
         username = name.replace(" ", "") if name else email.split("@")[0]
 
         # ✅ Cari atau buat user di database
-        user = db.query(User).filter(User.google_id == google_id).first()
-        if not user:
-            user = db.query(User).filter(User.email == email).first()
-            if user:
-                user.google_id = google_id
-                user.username = username
-            else:
-                user = User(username=username, email=email, google_id=google_id)
-                db.add(user)
-            db.commit()
-            db.refresh(user)
+        user = await run_in_threadpool(_find_or_create_user, db, google_id, email, username)
 
         # ✅ Buat JWT token
         access_token = create_access_token(
-            data={"sub": user.email, "id": user.id},
+            data={"sub": user["email"], "id": user["id"]},
             expires_delta=timedelta(minutes=60)
         )
 
@@ -116,8 +106,3 @@ def google_callback(
         return RedirectResponse(
             url=f"{FRONTEND_URL}/login?error=google_failed"
         )
-
-
-    except Exception as e:
-        print("Google login error:", str(e))
-        raise HTTPException(status_code=400, detail="Gagal login dengan Google")
\ No newline at end of file
@@ -0,0 +1,156 @@
+# app/auth/google_oauth.py
+"""
+Klien HTTP Google OAuth bersama + cache sertifikat penanda tangan ID token.
+
+- Satu httpx.AsyncClient (dibuat/ditutup di lifespan) dengan timeout eksplisit,
+  jadi tukar `code` -> token memakai ulang koneksi TLS ke oauth2.googleapis.com.
+- Sertifikat publik Google (v1/certs) di-cache sesuai `Cache-Control: max-age`
+  dari respons Google. Setelah login pertama, verifikasi ID token murni kerja
+  CPU lokal tanpa round trip ke googleapis.com.
+- Jika `kid` token tidak ada di cache (rotasi kunci), sertifikat diambil ulang
+  sekali, dibatasi GOOGLE_CERTS_MIN_REFRESH supaya token sampah tidak bisa
+  memaksa fetch terus-menerus.
+"""
+import asyncio
+import os
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from google.auth import jwt as google_jwt
+
+load_dotenv()
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_CONNECT_TIMEOUT = float(os.getenv("GOOGLE_CONNECT_TIMEOUT", 5))
+GOOGLE_READ_TIMEOUT = float(os.getenv("GOOGLE_READ_TIMEOUT", 10))
+# Dipakai jika respons certs tidak membawa max-age
+GOOGLE_CERTS_DEFAULT_TTL = float(os.getenv("GOOGLE_CERTS_DEFAULT_TTL", 3600))
+GOOGLE_CERTS_MIN_REFRESH = float(os.getenv("GOOGLE_CERTS_MIN_REFRESH", 30))
+GOOGLE_CLOCK_SKEW = int(os.getenv("GOOGLE_CLOCK_SKEW", 10))
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=5, keepalive_expiry=60),
+        timeout=httpx.Timeout(
+            connect=GOOGLE_CONNECT_TIMEOUT,
+            read=GOOGLE_READ_TIMEOUT,
+            write=GOOGLE_READ_TIMEOUT,
+            pool=GOOGLE_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+async def start_google_client() -> None:
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_google_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_google_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        # Di luar lifespan (skrip/test): buat sendiri
+        _client = _build_client()
+    return _client
+
+
+def cache_max_age(cache_control: Optional[str]) -> Optional[float]:
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return float(match.group(1)) if match else None
+
+
+class GoogleCertCache:
+    def __init__(self, url: str = GOOGLE_CERTS_URL):
+        self.url = url
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    async def _fetch(self) -> None:
+        res = await get_google_client().get(self.url)
+        res.raise_for_status()
+        self._certs = res.json()
+        now = time.monotonic()
+        max_age = cache_max_age(res.headers.get("cache-control"))
+        self._fetched_at = now
+        self._expires_at = now + (max_age if max_age is not None else GOOGLE_CERTS_DEFAULT_TTL)
+        self.fetches += 1
+
+    async def get(self, force: bool = False) -> Dict[str, str]:
+        if not force and self._certs and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return self._certs
+        async with self._lock:
+            now = time.monotonic()
+            # Request lain mungkin sudah me-refresh selagi kita menunggu lock
+            fresh = self._certs and now < self._expires_at
+            if force:
+                fresh = self._certs and now - self._fetched_at < GOOGLE_CERTS_MIN_REFRESH
+            if not fresh:
+                try:
+                    await self._fetch()
+                except (httpx.HTTPError, ValueError):
+                    self.fetch_errors += 1
+                    if not self._certs:
+                        raise
+                    # Pakai sertifikat lama dulu daripada menggagalkan semua login
+        return self._certs
+
+    def stats(self) -> dict:
+        return {
+            "certs": len(self._certs),
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "expires_in": max(0.0, self._expires_at - time.monotonic()) if self._certs else None,
+        }
+
+
+google_certs = GoogleCertCache()
+
+
+async def exchange_code(code: str, redirect_uri: str) -> dict:
+    res = await get_google_client().post(GOOGLE_TOKEN_URL, data={
+        "client_id": GOOGLE_CLIENT_ID,
+        "client_secret": GOOGLE_CLIENT_SECRET,
+        "code": code,
+        "grant_type": "authorization_code",
+        "redirect_uri": redirect_uri,
+    })
+    res.raise_for_status()
+    return res.json()
+
+
+async def verify_id_token(token: str, audience: Optional[str] = GOOGLE_CLIENT_ID) -> dict:
+    """Setara `id_token.verify_oauth2_token`, tapi sertifikat dari cache."""
+    certs = await google_certs.get()
+    kid = google_jwt.decode_header(token).get("kid")
+    if kid not in certs:
+        certs = await google_certs.get(force=True)
+    idinfo = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=GOOGLE_CLOCK_SKEW)
+    if idinfo.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Issuer salah: {idinfo.get('iss')}")
+    return idinfo
@@ -1,21 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
+from app.auth.passwords import password_hasher
 from app.database import get_db
+from app.utils.rate_limit import rate_limit
 from app.models import User
 from app.utils.whatsapp_otp import send_otp_whatsapp, verify_otp
 from app.schemas import VerifyOtpRegisterRequest
 
 router = APIRouter()
 
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto"
-)
 
-
-@router.post("/request-otp")
+@router.post("/request-otp", dependencies=[Depends(rate_limit("request_otp"))])
 def request_otp(phone_number: str):
     if not send_otp_whatsapp(phone_number):
         raise HTTPException(status_code=500, detail="Gagal mengirim OTP")
@@ -23,35 +20,35 @@ def request_otp(phone_number: str):
     return {"message": "Kode OTP berhasil dikirim ke WhatsApp"}
 
 
+def _save_user(db: Session, request: VerifyOtpRegisterRequest, hashed_password: str) -> None:
+    user = User(
+        username=request.name,
+        email=request.email,
+        password=hashed_password,
+        phone_number=request.phone_number
+    )
+    db.add(user)
+    db.commit()
+
+
 @router.post("/verify-otp")
-def verify_otp_and_register(
+async def verify_otp_and_register(
     request: VerifyOtpRegisterRequest,
     db: Session = Depends(get_db)
 ):
     # 1️⃣ Verifikasi OTP
-    if not verify_otp(request.phone_number, request.otp):
+    # Store OTP bisa berupa tabel SQL (multi-worker), jangan blok event loop
+    if not await run_in_threadpool(verify_otp, request.phone_number, request.otp):
         raise HTTPException(status_code=400, detail="OTP salah atau kadaluarsa")
 
     # 2️⃣ Cek email
-    if db.query(User).filter(User.email == request.email).first():
+    if await run_in_threadpool(lambda: db.query(User.id).filter(User.email == request.email).first()):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # 3️⃣ HASH PASSWORD (AMAN 72 BYTE)
-    password = request.password
-    if len(password) > 72:
-        password = password[:72]
-
-    hashed_password = pwd_context.hash(password)
+    # 3️⃣ HASH PASSWORD (dipotong 72 byte, dikerjakan proses hasher)
+    hashed_password = await password_hasher.hash(request.password)
 
     # 4️⃣ Simpan user
-    user = User(
-        username=request.name,
-        email=request.email,
-        password=hashed_password,
-        phone_number=request.phone_number
-    )
-
-    db.add(user)
-    db.commit()
+    await run_in_threadpool(_save_user, db, request, hashed_password)
 
     return {"message": "Verifikasi berhasil! Akun Anda telah dibuat."}
@@ -0,0 +1,167 @@
+# app/auth/passwords.py
+"""
+Hash & verifikasi password di ProcessPoolExecutor khusus.
+
+pbkdf2 sengaja mahal (puluhan ms CPU per hash). Kalau dijalankan di threadpool
+AnyIO bawaan (40 thread, ikut GIL), burst login membuat endpoint sync lain
+(termasuk ingest sensor) ikut antre. Di sini hashing dikerjakan proses worker
+terpisah dengan jumlah job antre yang dibatasi; route auth cukup `await`.
+
+- PASSWORD_HASH_ROUNDS: rounds pbkdf2_sha256 (default passlib: 29000)
+- Hash dengan parameter lama (rounds berbeda, atau bcrypt dari alur reset lama)
+  tetap bisa login dan di-rehash otomatis lewat `verify_and_update`.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", 29000))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Job yang boleh menunggu worker; lebih dari ini langsung 503 daripada menumpuk
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 16))
+# bcrypt (dan pbkdf2 di alur lama) hanya memakai 72 byte pertama
+MAX_PASSWORD_LENGTH = 72
+
+_worker_context = None
+
+
+class HasherBusy(HTTPException):
+    """503 saat antrean hashing penuh atau pool worker sedang dipulihkan."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Server sedang sibuk, coba lagi sebentar.",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _init_worker(rounds: int) -> None:
+    global _worker_context
+    from passlib.context import CryptContext
+
+    _worker_context = CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        # min = max = rounds: hash dengan rounds lain dianggap perlu di-rehash
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+def _hash(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    if hashed.startswith(("$2a$", "$2b$", "$2y$")):
+        # Hash bcrypt dari forgot_password lama. passlib 1.7 tidak kompatibel
+        # dengan bcrypt>=4, jadi diverifikasi langsung lalu dimigrasi ke pbkdf2.
+        import bcrypt
+
+        if not bcrypt.checkpw(password.encode()[:MAX_PASSWORD_LENGTH], hashed.encode()):
+            return False, None
+        return True, _worker_context.hash(password)
+    try:
+        return _worker_context.verify_and_update(password, hashed)
+    except ValueError:
+        # Format hash tidak dikenali
+        return False, None
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, rounds: int = PASSWORD_HASH_ROUNDS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+        self.broken = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn: jangan fork proses uvicorn yang sudah punya banyak thread
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.rounds,),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusy()
+        self.start()
+        executor = self._executor
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # Worker mati (OOM/kill): buang pool rusak, request berikutnya membuat pool baru
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.broken += 1
+            raise HasherBusy()
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        result = await self._run(_hash, password[:MAX_PASSWORD_LENGTH])
+        self.hashed += 1
+        return result
+
+    async def verify_and_update(self, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        (cocok, hash_baru). `hash_baru` terisi jika hash tersimpan memakai
+        parameter lama; pemanggil menyimpannya ke kolom users.password.
+        """
+        if not hashed:
+            # Akun Google tanpa password
+            return False, None
+        ok, new_hash = await self._run(_verify_and_update, password[:MAX_PASSWORD_LENGTH], hashed)
+        self.verified += 1
+        if new_hash:
+            self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+            "broken": self.broken,
+        }
+
+
+password_hasher = PasswordHasher()
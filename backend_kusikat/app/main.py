@@ -2,31 +2,46 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI, HTTPException, Depends, status, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import Text, type_coerce, insert, func
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone, date as dt_date
 import os
-import smtplib
 import random
 import json
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from typing import List, Optional
+from types import SimpleNamespace
 import re
+import time
+import asyncio
 
 # === ROUTES ===
-from app.routes.ai import router as ai_router
+from app.routes.ai import router as ai_router, schedule_recipe_precompute
+from app.utils.recipe_suggestions import recipe_suggestions, PRECOMPUTE_STATUSES
 from app.auth.google_auth import router as google_auth
+from app.auth.google_oauth import google_certs, start_google_client, close_google_client
 from app.auth.manual_auth import router as manual_auth_router
+from app.utils.whatsapp_otp import WA_API_URL, WA_API_KEY
+from app.utils.otp_store import otp_store
+from app.utils.reset_token_sweeper import reset_token_sweeper
+from app.utils.rate_limit import rate_limit, rate_limiter
+from app.utils.mail_queue import mail_queue
+from app.utils import chat_search
+from app.utils.groq_client import start_groq_client, close_groq_client
 
 # === DATABASE & MODELS ===
 from app.database import SessionLocal, engine, Base
-from app.models import User, PasswordResetToken, Sensor, Notification, ChatHistory
-from passlib.context import CryptContext
+from app.migrations import migrate_recipe_json_columns
+from app.models import User, PasswordResetToken, Sensor, Notification, ChatHistory, ChatHistoryDeletion
 
 # === SCHEMAS ===
 from app.schemas import (
@@ -41,22 +56,19 @@ from app.schemas import (
     SensorDataCreate,
     ChatMessage,
     ChatMessageCreate,
+    ChatHistoryRequest,
+    ChatHistoryBulkResponse,
+    ClearChatHistoryResponse,
+    ChatDeletionStatus,
+    ChatSearchHit,
 )
 
 from app.auth.jwt_handler import create_access_token
+from app.auth.auth_cache import auth_cache, UserSnapshot
+from app.auth.passwords import password_hasher
 
 
 # === Setup ===
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    if len(password) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
 def get_db():
     db = SessionLocal()
     try:
@@ -77,15 +89,36 @@ def verify_token(token: str):
     except JWTError:
         raise HTTPException(status_code=401, detail="Token tidak valid")
 
+def _current_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    payload = auth_cache.claims(credentials.credentials, verify_token)
+    user_id = payload.get("id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Token tidak valid")
+    return user_id
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """
+    User yang sedang login sebagai snapshot read-only dari `auth_cache`:
+    request polling yang berulang tidak perlu decode JWT maupun query ke tabel users.
+    Endpoint yang mengubah user pakai `get_current_user_for_update`.
+    """
+    user = auth_cache.user(
+        _current_user_id(credentials),
+        lambda user_id: db.query(User).filter(User.id == user_id).first()
+    )
+    if not user:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    return user
+
+def get_current_user_for_update(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
 ) -> User:
-    payload = verify_token(credentials.credentials)
-    user_id = payload.get("id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token tidak valid")
-    user = db.query(User).filter(User.id == user_id).first()
+    """Baris User terikat session (bukan dari cache); panggil `auth_cache.invalidate_user` setelah commit."""
+    user = db.query(User).filter(User.id == _current_user_id(credentials)).first()
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan")
     return user
@@ -144,21 +177,24 @@ def _send_wa_if_status_changed(
         print(f"📅 Notifikasi transisi '{title}' sudah dikirim hari ini. Skip.")
         return
 
+    # Lepas koneksi DB ke pool selama menunggu gateway WA
+    user_id = current_user.id
+    db.commit()
+
     try:
         clean_phone = clean_phone_number(phone)  # ✅ pakai fungsi validasi
 
-        # 🔥 FIXED: URL tanpa spasi!
-        url = "https://api.aliffajriadi.my.id/botwa/api/kirim-pesan"
+        url = WA_API_URL
         headers = {
             "Content-Type": "application/json",
-            "x-api-key": "apikeyrivaldokelompokpbliot02334"
+            "x-api-key": WA_API_KEY
         }
         payload = {"nomor": clean_phone, "pesan": msg}
         response = requests.post(url, json=payload, headers=headers, timeout=10)
 
         if response.status_code == 200:
             new_notif = Notification(
-                user_id=current_user.id,
+                user_id=user_id,
                 title=title,
                 message=msg,
                 sent_at=datetime.now(timezone(timedelta(hours=7))),
@@ -174,11 +210,103 @@ def _send_wa_if_status_changed(
         print(f"Error kirim WA status change: {e}")
 
 
+# Worker khusus notifikasi WA: gateway yang lambat tidak boleh menahan ingest sensor
+# (maupun threadpool / pool koneksi DB milik request).
+WA_NOTIFY_WORKERS = int(os.getenv("WA_NOTIFY_WORKERS", 4))
+wa_notify_executor = ThreadPoolExecutor(max_workers=WA_NOTIFY_WORKERS, thread_name_prefix="wa-notify")
+
+
+def _notify_status_change_background(user_id: int, new_status: str, previous_status: str):
+    """
+    Dijalankan di `wa_notify_executor` setelah data sensor tersimpan.
+    Pakai session DB sendiri karena session request sudah ditutup.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or not user.phone_number:
+            return
+        _send_wa_if_status_changed(
+            new_status=new_status,
+            previous_status=previous_status,
+            phone=user.phone_number,
+            current_user=user,
+            db=db
+        )
+    finally:
+        db.close()
+
+
+# === Hapus Riwayat Chat Bertahap ===
+CHAT_DELETE_CHUNK_SIZE = int(os.getenv("CHAT_DELETE_CHUNK_SIZE", 500))
+CHAT_DELETE_CHUNK_PAUSE = float(os.getenv("CHAT_DELETE_CHUNK_PAUSE", 0.05))
+# Satu worker: job hapus diproses berurutan, tidak berebut lock dengan insert
+chat_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-cleanup")
+
+
+def _chat_visible_after_id(db: Session, user_id: int) -> int:
+    """Pesan dengan id <= nilai ini sudah di-tombstone oleh job hapus."""
+    cutoff = db.query(func.max(ChatHistoryDeletion.max_id)).filter(
+        ChatHistoryDeletion.user_id == user_id
+    ).scalar()
+    return cutoff or 0
+
+
+def _purge_chat_history(job_id: int):
+    """
+    Hapus baris chat_histories milik job dalam chunk kecil (satu commit per chunk),
+    supaya tidak ada DELETE besar yang menahan lock / timeout di MySQL.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(ChatHistoryDeletion).filter(ChatHistoryDeletion.id == job_id).first()
+        if not job or job.status == "done":
+            return
+        job.status = "running"
+        db.commit()
+
+        while True:
+            ids = [
+                row.id for row in db.query(ChatHistory.id)
+                .filter(ChatHistory.user_id == job.user_id, ChatHistory.id <= job.max_id)
+                .order_by(ChatHistory.id)
+                .limit(CHAT_DELETE_CHUNK_SIZE)
+                .all()
+            ]
+            if not ids:
+                break
+            db.query(ChatHistory).filter(ChatHistory.id.in_(ids)).delete(synchronize_session=False)
+            chat_search.remove_messages(db, ids)
+            job.deleted += len(ids)
+            db.commit()
+            time.sleep(CHAT_DELETE_CHUNK_PAUSE)
+
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        print(f"🗑️ Job hapus chat #{job_id} selesai: {job.deleted} pesan.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Job hapus chat #{job_id} gagal: {e}")
+        job = db.query(ChatHistoryDeletion).filter(ChatHistoryDeletion.id == job_id).first()
+        if job:
+            job.status = "failed"
+            db.commit()
+    finally:
+        db.close()
+
+
 # === Lifespan ===
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("✅ Membuat tabel database...")
     Base.metadata.create_all(bind=engine)
+    migrate_recipe_json_columns(engine)
+    print(f"✅ Indeks pencarian chat: {chat_search.init_chat_search(engine)}")
+    # create_all tidak menambah index baru ke tabel yang sudah ada
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     
     # 🔥 Auto-create user ID=1 untuk IoT (jika belum ada)
     db = SessionLocal()
@@ -203,9 +331,32 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
 
+    # Lanjutkan job hapus chat yang terputus saat server mati
+    db = SessionLocal()
+    try:
+        unfinished = db.query(ChatHistoryDeletion.id).filter(
+            ChatHistoryDeletion.status.in_(["pending", "running", "failed"])
+        ).all()
+        for (job_id,) in unfinished:
+            chat_cleanup_executor.submit(_purge_chat_history, job_id)
+    finally:
+        db.close()
+
     print("✅ Database siap.")
+    await start_groq_client()
+    recipe_suggestions.bind_loop(asyncio.get_running_loop())
+    await start_google_client()
+    password_hasher.start()
+    reset_token_sweeper.start()
+    mail_queue.start()
     yield
 
+    await reset_token_sweeper.stop()
+    await run_in_threadpool(mail_queue.stop)
+    await close_groq_client()
+    await close_google_client()
+    password_hasher.close()
+
 app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
@@ -228,74 +379,270 @@ def root():
     return {"message": "Backend ResQ Freeze berjalan!"}
 
 
+@app.get("/api/auth/metrics")
+def get_auth_metrics():
+    """Cache autentikasi & sertifikat Google, antrean hashing/email, OTP WhatsApp, dan rate limit."""
+    return {
+        "auth_cache": auth_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "otp_store": otp_store.stats(),
+        "reset_token_sweeper": reset_token_sweeper.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "google_certs": google_certs.stats(),
+        "mail_queue": mail_queue.stats(),
+    }
+
+
 # ==================== 🔥 CHAT HISTORY ENDPOINTS ====================
+CHAT_HISTORY_PAGE_SIZE = 50
+CHAT_HISTORY_MAX_PAGE_SIZE = 200
+
+
+def _chat_row_to_raw_json(msg) -> str:
+    """
+    Serialisasi satu baris chat ke JSON tanpa json.loads/json.dumps ulang
+    untuk ingredients & steps: teks JSON dari database langsung disisipkan.
+    `msg` adalah row dari query `type_coerce(..., Text)` (lihat get_chat_history).
+    """
+    return (
+        '{"id":%d,"user_id":%d,"message_type":%s,"sender":%s,"content":%s,'
+        '"recipe_name":%s,"ingredients":%s,"steps":%s,"created_at":%s}'
+    ) % (
+        msg.id,
+        msg.user_id,
+        json.dumps(msg.message_type),
+        json.dumps(msg.sender),
+        json.dumps(msg.content),
+        json.dumps(msg.recipe_name),
+        msg.ingredients or "[]",
+        msg.steps or "[]",
+        json.dumps(msg.created_at.isoformat() if msg.created_at else None),
+    )
+
+
 @app.get("/api/chat-history", response_model=List[ChatMessage])
 def get_chat_history(
+    before_id: Optional[int] = Query(None, ge=1, description="Ambil pesan dengan id < before_id"),
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=CHAT_HISTORY_MAX_PAGE_SIZE),
+    raw: bool = Query(False, description="Kirim JSON tersimpan apa adanya (tanpa decode)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    db_messages = db.query(ChatHistory).filter(
-        ChatHistory.user_id == current_user.id
-    ).order_by(ChatHistory.created_at).all()
-
-    result = []
-    for msg in db_messages:
-        ingredients = json.loads(msg.ingredients) if msg.ingredients else []
-        steps = json.loads(msg.steps) if msg.steps else []
-        result.append(ChatMessage(
+    """
+    Keyset pagination: halaman terbaru dulu. Halaman berikutnya (lebih lama)
+    diambil dengan `before_id` = id pesan paling awal di halaman sekarang.
+    Urutan di dalam satu halaman tetap kronologis (lama -> baru).
+    """
+    if raw:
+        # type_coerce ke Text: driver mengembalikan teks JSON apa adanya,
+        # tanpa result processor JSON (json.loads) dari SQLAlchemy.
+        query = db.query(
+            ChatHistory.id,
+            ChatHistory.user_id,
+            ChatHistory.message_type,
+            ChatHistory.sender,
+            ChatHistory.content,
+            ChatHistory.recipe_name,
+            type_coerce(ChatHistory.ingredients, Text).label("ingredients"),
+            type_coerce(ChatHistory.steps, Text).label("steps"),
+            ChatHistory.created_at,
+        )
+    else:
+        query = db.query(ChatHistory)
+
+    query = query.filter(
+        ChatHistory.user_id == current_user.id,
+        ChatHistory.id > _chat_visible_after_id(db, current_user.id)
+    )
+    if before_id is not None:
+        query = query.filter(ChatHistory.id < before_id)
+    db_messages = query.order_by(ChatHistory.id.desc()).limit(limit).all()[::-1]
+
+    if raw:
+        body = "[" + ",".join(_chat_row_to_raw_json(msg) for msg in db_messages) + "]"
+        return Response(content=body, media_type="application/json")
+
+    return [
+        ChatMessage(
             id=msg.id,
             user_id=msg.user_id,
             message_type=msg.message_type,
             sender=msg.sender,
             content=msg.content,
             recipe_name=msg.recipe_name,
-            ingredients=ingredients,
-            steps=steps,
+            ingredients=msg.ingredients or [],
+            steps=msg.steps or [],
             created_at=msg.created_at
-        ))
-    return result
+        )
+        for msg in db_messages
+    ]
 
 
 @app.post("/api/chat-history", status_code=status.HTTP_201_CREATED)
 def create_chat_message(
     message: ChatMessageCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    ingredients_str = json.dumps(message.ingredients) if message.ingredients else None
-    steps_str = json.dumps(message.steps) if message.steps else None
-
     db_message = ChatHistory(
         user_id=current_user.id,
         message_type=message.message_type,
         sender=message.sender,
         content=message.content,
         recipe_name=message.recipe_name,
-        ingredients=ingredients_str,
-        steps=steps_str
+        ingredients=message.ingredients or None,
+        steps=message.steps or None
     )
     db.add(db_message)
+    db.flush()
+    chat_search.index_messages(db, [db_message])
     db.commit()
-    db.refresh(db_message)
     return {"id": db_message.id}
 
 
-@app.delete("/api/chat-history")
+@app.get("/api/chat-history/search", response_model=List[ChatSearchHit])
+def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Cari di isi pesan, nama resep, bahan, dan langkah. Hasil terurut relevansi."""
+    hits = chat_search.search_messages(
+        db, current_user.id, q, limit=limit, offset=offset,
+        min_id=_chat_visible_after_id(db, current_user.id)
+    )
+    if not hits:
+        return []
+
+    rows = {
+        msg.id: msg for msg in db.query(ChatHistory).filter(
+            ChatHistory.user_id == current_user.id,
+            ChatHistory.id.in_([message_id for message_id, _ in hits])
+        )
+    }
+    return [
+        ChatSearchHit(
+            id=msg.id,
+            user_id=msg.user_id,
+            message_type=msg.message_type,
+            sender=msg.sender,
+            content=msg.content,
+            recipe_name=msg.recipe_name,
+            ingredients=msg.ingredients or [],
+            steps=msg.steps or [],
+            created_at=msg.created_at,
+            score=score
+        )
+        for message_id, score in hits
+        if (msg := rows.get(message_id)) is not None
+    ]
+
+
+@app.post(
+    "/api/chat-history/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ChatHistoryBulkResponse
+)
+def create_chat_messages_bulk(
+    request: ChatHistoryRequest,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Simpan satu percakapan (pesan user + balasan bot, dst.) dengan satu
+    INSERT multi-row dan satu commit. Mengembalikan id sesuai urutan input.
+    """
+    rows = [
+        {
+            "user_id": current_user.id,
+            "message_type": message.message_type.value,
+            "sender": message.sender.value,
+            "content": message.content,
+            "recipe_name": message.recipe_name,
+            "ingredients": message.ingredients or None,
+            "steps": message.steps or None,
+        }
+        for message in request.messages
+    ]
+    stmt = insert(ChatHistory).values(rows)
+
+    if db.get_bind().dialect.insert_returning:
+        result = db.execute(stmt.returning(ChatHistory.id))
+        ids = sorted(row.id for row in result)
+    else:
+        # MySQL: tanpa RETURNING. LAST_INSERT_ID() = id baris pertama, dan
+        # InnoDB mengalokasikan id berurutan untuk satu INSERT multi-row.
+        result = db.execute(stmt)
+        first_id = result.lastrowid
+        ids = list(range(first_id, first_id + len(rows)))
+
+    chat_search.index_messages(db, [
+        SimpleNamespace(id=message_id, **row) for message_id, row in zip(ids, rows)
+    ])
+    db.commit()
+    return ChatHistoryBulkResponse(ids=ids)
+
+
+@app.delete(
+    "/api/chat-history",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=ClearChatHistoryResponse
+)
 def clear_chat_history(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    db.query(ChatHistory).filter(
-        ChatHistory.user_id == current_user.id
-    ).delete()
+    """
+    Langsung sembunyikan riwayat (tombstone max_id), lalu hapus barisnya
+    bertahap di background. Progres: GET /api/chat-history/deletion-status.
+    """
+    max_id, total = db.query(func.max(ChatHistory.id), func.count(ChatHistory.id)).filter(
+        ChatHistory.user_id == current_user.id,
+        ChatHistory.id > _chat_visible_after_id(db, current_user.id)
+    ).one()
+
+    job = ChatHistoryDeletion(
+        user_id=current_user.id,
+        max_id=max_id or 0,
+        total=total,
+        status="pending" if total else "done",
+        finished_at=None if total else datetime.utcnow()
+    )
+    db.add(job)
     db.commit()
-    return {"message": "Riwayat chat berhasil dihapus"}
+
+    if total:
+        chat_cleanup_executor.submit(_purge_chat_history, job.id)
+
+    return ClearChatHistoryResponse(job_id=job.id, status=job.status)
+
+
+@app.get("/api/chat-history/deletion-status", response_model=ChatDeletionStatus)
+def get_chat_deletion_status(
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    job = db.query(ChatHistoryDeletion).filter(
+        ChatHistoryDeletion.user_id == current_user.id
+    ).order_by(ChatHistoryDeletion.id.desc()).first()
+    if not job:
+        raise HTTPException(404, "Belum ada permintaan hapus riwayat chat")
+    return ChatDeletionStatus(
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        deleted=job.deleted,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
 
 
 @app.get("/api/notifications")
 def get_user_notifications(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     notifications = db.query(Notification)\
                       .filter(Notification.user_id == current_user.id)\
@@ -315,46 +662,72 @@ def get_user_notifications(
 
 
 # === AUTH & USER ===
-@app.post("/api/register", status_code=status.HTTP_201_CREATED)
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
+# Route yang memakai password bersifat async: hashing ditunggu di `password_hasher`
+# (proses terpisah), query DB tetap di threadpool lewat run_in_threadpool.
+def _register_user(db: Session, request: RegisterRequest, hashed_password: str) -> Optional[User]:
     if db.query(User).filter(
         (User.email == request.email) | (User.username == request.username)
     ).first():
-        raise HTTPException(400, "Username atau email sudah terdaftar")
-    
+        return None
     user = User(
         username=request.username,
         email=request.email,
-        password=hash_password(request.password),
+        password=hashed_password,
         phone_number=request.phone_number,
     )
     db.add(user)
     db.commit()
     db.refresh(user)
+    return user
+
+def _save_password(db: Session, user: User, hashed_password: str) -> None:
+    user.password = hashed_password
+    db.commit()
+    auth_cache.invalidate_user(user.id)
+
+@app.post("/api/register", status_code=status.HTTP_201_CREATED)
+async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+    # Cek duplikat murah dulu supaya request gagal tidak membayar biaya hash
+    taken = await run_in_threadpool(
+        lambda: db.query(User.id).filter(
+            (User.email == request.email) | (User.username == request.username)
+        ).first()
+    )
+    if taken:
+        raise HTTPException(400, "Username atau email sudah terdaftar")
+
+    hashed_password = await password_hasher.hash(request.password)
+    user = await run_in_threadpool(_register_user, db, request, hashed_password)
+    if user is None:
+        raise HTTPException(400, "Username atau email sudah terdaftar")
     return {"message": "Registrasi berhasil!", "user": {"id": user.id, "username": user.username}}
 
-@app.post("/api/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request.username).first()
-    if not user or not verify_password(request.password, user.password):
+@app.post("/api/login", dependencies=[Depends(rate_limit("login"))])
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == request.username).first()
+    )
+    ok, new_hash = await password_hasher.verify_and_update(request.password, user.password if user else None)
+    if not ok:
         raise HTTPException(401, "Username atau password salah")
-    
+
+    user_data = {"id": user.id, "username": user.username, "email": user.email}
+    if new_hash:
+        # Parameter hash berubah (rounds/skema): simpan hash baru secara transparan
+        await run_in_threadpool(_save_password, db, user, new_hash)
+
     token = create_access_token(
-        data={"sub": user.email, "id": user.id},
+        data={"sub": user_data["email"], "id": user_data["id"]},
         expires_delta=timedelta(hours=24)
     )
     return {
         "message": "Login berhasil",
         "access_token": token,
-        "user": {"id": user.id, "username": user.username, "email": user.email}
+        "user": user_data
     }
 
 @app.get("/api/me")
-def me(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    payload = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.id == payload.get("id")).first()
-    if not user:
-        raise HTTPException(404, "User tidak ditemukan")
+def me(user: UserSnapshot = Depends(get_current_user)):
     return {
         "id": user.id,
         "username": user.username,
@@ -364,7 +737,7 @@ def me(credentials: HTTPAuthorizationCredentials = Depends(security), db: Sessio
         "has_password": user.password is not None
     }
 
-@app.post("/api/forgot-password")
+@app.post("/api/forgot-password", dependencies=[Depends(rate_limit("forgot_password"))])
 def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == request.email).first()
     if not user:
@@ -372,28 +745,27 @@ def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db
 
     otp = str(random.randint(100000, 999999))
     expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+    # Satu token aktif per email: OTP lama langsung tidak berlaku
+    db.query(PasswordResetToken).filter(
+        PasswordResetToken.email == request.email
+    ).delete(synchronize_session=False)
     db.add(PasswordResetToken(email=request.email, otp=otp, expires_at=expires))
     db.commit()
 
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = "no-reply@resqfreeze.com"
-        msg["To"] = request.email
-        msg["Subject"] = "Kode OTP - Reset Password"
-        msg.attach(MIMEText(
-            f"Halo {user.username},\n\nKode OTP Anda: {otp}\n\nBerlaku 5 menit.",
-            "plain"
-        ))
-        with smtplib.SMTP(os.getenv("EMAIL_HOST"), int(os.getenv("EMAIL_PORT"))) as server:
-            server.starttls()
-            server.login(os.getenv("EMAIL_USERNAME"), os.getenv("EMAIL_PASSWORD"))
-            server.send_message(msg)
-    except Exception as e:
-        print("Gagal kirim email:", e)
+    msg = MIMEMultipart()
+    msg["From"] = "no-reply@resqfreeze.com"
+    msg["To"] = request.email
+    msg["Subject"] = "Kode OTP - Reset Password"
+    msg.attach(MIMEText(
+        f"Halo {user.username},\n\nKode OTP Anda: {otp}\n\nBerlaku 5 menit.",
+        "plain"
+    ))
+    # Dikirim worker antrean email (koneksi SMTP persisten), request tidak menunggu SMTP
+    mail_queue.enqueue(msg)
 
     return {"message": "Jika email terdaftar, kami telah mengirim kode OTP."}
 
-@app.post("/api/auth/request-otp")
+@app.post("/api/auth/request-otp", dependencies=[Depends(rate_limit("request_otp"))])
 def request_otp(
     phone_number: str = Body(..., embed=True),
     db: Session = Depends(get_db)
@@ -409,11 +781,10 @@ def request_otp(
     otp = str(random.randint(100000, 999999))
 
     try:
-        # 🔥 FIXED: URL tanpa spasi!
-        url = "https://api.aliffajriadi.my.id/botwa/api/kirim-pesan"
+        url = WA_API_URL
         headers = {
             "Content-Type": "application/json",
-            "x-api-key": "apikeyrivaldokelompokpbliot02334"
+            "x-api-key": WA_API_KEY
         }
         payload = {
             "nomor": clean_phone,
@@ -447,46 +818,45 @@ def verify_otp(request: VerifyOTPRequest, db: Session = Depends(get_db)):
     return {"success": True}
 
 @app.post("/api/reset-password")
-def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == request.email).first()
+async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == request.email).first())
     if not user:
         raise HTTPException(404, "User tidak ditemukan")
-    user.password = hash_password(request.new_password)
-    db.commit()
+    await run_in_threadpool(_save_password, db, user, await password_hasher.hash(request.new_password))
     return {"message": "Password berhasil diubah!"}
 
 @app.post("/api/user/set-password")
-def set_password(request: SetPasswordRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def set_password(request: SetPasswordRequest, user: User = Depends(get_current_user_for_update), db: Session = Depends(get_db)):
     if user.password:
         raise HTTPException(400, "Password sudah diatur. Gunakan 'Ganti Password'.")
-    user.password = hash_password(request.new_password)
-    db.commit()
+    await run_in_threadpool(_save_password, db, user, await password_hasher.hash(request.new_password))
     return {"message": "Password berhasil diatur"}
 
 @app.put("/api/user/password")
-def change_password(request: ChangePasswordRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def change_password(request: ChangePasswordRequest, user: User = Depends(get_current_user_for_update), db: Session = Depends(get_db)):
     if not user.password:
         raise HTTPException(400, "Atur password terlebih dahulu.")
-    if not verify_password(request.old_password, user.password):
+    ok, _ = await password_hasher.verify_and_update(request.old_password, user.password)
+    if not ok:
         raise HTTPException(400, "Password lama salah.")
-    user.password = hash_password(request.new_password)
-    db.commit()
+    await run_in_threadpool(_save_password, db, user, await password_hasher.hash(request.new_password))
     return {"message": "Password berhasil diubah"}
 
 @app.put("/api/user/phone")
-def update_phone(request: UpdatePhoneRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_phone(request: UpdatePhoneRequest, user: User = Depends(get_current_user_for_update), db: Session = Depends(get_db)):
     try:
         request.phone_number = clean_phone_number(request.phone_number)  # ✅ validasi saat update
     except ValueError as e:
         raise HTTPException(400, str(e))
     user.phone_number = request.phone_number
     db.commit()
+    auth_cache.invalidate_user(user.id)
     return {"message": "Nomor telepon diperbarui"}
 
 @app.put("/api/user/username")
 def update_username(
     request: dict = Body(..., example={"username": "Firli Hanifurahman"}),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_for_update),
     db: Session = Depends(get_db)
 ):
     new_username = request.get("username", "").strip()
@@ -508,6 +878,7 @@ def update_username(
 
     current_user.username = new_username
     db.commit()
+    auth_cache.invalidate_user(current_user.id)
 
     return {
         "message": "Username berhasil diperbarui",
@@ -573,14 +944,24 @@ def create_sensor_data(
     db.commit()
     db.refresh(sensor)
 
-    # 🔥 Kirim notifikasi jika status berubah
+    # 🔥 Kirim notifikasi jika status berubah (di background, tidak menahan ingest)
     if user.phone_number and new_status != previous_status:
-        _send_wa_if_status_changed(
+        wa_notify_executor.submit(
+            _notify_status_change_background,
+            user_id=user_id,
             new_status=new_status,
-            previous_status=previous_status,
-            phone=user.phone_number,
-            current_user=user,
-            db=db
+            previous_status=previous_status
+        )
+
+    # 🔥 Siapkan resep lebih awal: user biasanya membuka halaman makanan setelah notifikasi
+    if new_status != previous_status and new_status in PRECOMPUTE_STATUSES:
+        schedule_recipe_precompute(
+            container_id=user_id,
+            status=new_status,
+            temperature=data.temperature,
+            humidity=data.humidity,
+            voc=data.voc,
+            user_name="Pengguna"
         )
 
     return {
@@ -643,7 +1024,7 @@ def get_sensor_history(
 @app.post("/api/send-notification")
 def send_notification_to_wa(
     request: dict = Body(...),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     message = request.get("message")
@@ -660,11 +1041,10 @@ def send_notification_to_wa(
         raise HTTPException(400, str(e))
 
     try:
-        # 🔥 FIXED: URL tanpa spasi!
-        url = "https://api.aliffajriadi.my.id/botwa/api/kirim-pesan"
+        url = WA_API_URL
         headers = {
             "Content-Type": "application/json",
-            "x-api-key": "apikeyrivaldokelompokpbliot02334"
+            "x-api-key": WA_API_KEY
         }
         payload = {
             "nomor": clean_phone,
@@ -0,0 +1,54 @@
+# app/migrations.py
+"""
+Migrasi skema kecil yang dijalankan saat startup (lifespan), idempotent.
+`Base.metadata.create_all` hanya membuat tabel baru, tidak mengubah kolom lama.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# Kolom resep yang dulu Text berisi string json.dumps, sekarang JSON native
+RECIPE_JSON_COLUMNS = ("ingredients", "steps")
+
+
+def _is_plain_text(column_type) -> bool:
+    return getattr(column_type, "__visit_name__", "").upper() == "TEXT"
+
+
+def migrate_recipe_json_columns(engine: Engine) -> None:
+    """
+    Ubah chat_histories.ingredients / steps dari TEXT ke JSON.
+
+    - MySQL: kolom jadi JSON native (MariaDB: LONGTEXT + CHECK JSON_VALID).
+    - PostgreSQL: kolom jadi json.
+    - SQLite: JSON disimpan sebagai TEXT, data lama sudah kompatibel, tidak perlu ALTER.
+
+    Backfill: string kosong / JSON rusak di-NULL-kan dulu supaya ALTER tidak gagal.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("mysql", "mariadb", "postgresql"):
+        return
+
+    inspector = inspect(engine)
+    if "chat_histories" not in inspector.get_table_names():
+        return
+
+    columns = {c["name"]: c["type"] for c in inspector.get_columns("chat_histories")}
+    pending = [name for name in RECIPE_JSON_COLUMNS if name in columns and _is_plain_text(columns[name])]
+    if not pending:
+        return
+
+    with engine.begin() as conn:
+        for name in pending:
+            print(f"🔧 Migrasi chat_histories.{name}: TEXT -> JSON")
+            conn.execute(text(f"UPDATE chat_histories SET {name} = NULL WHERE {name} = ''"))
+            if dialect in ("mysql", "mariadb"):
+                conn.execute(text(
+                    f"UPDATE chat_histories SET {name} = NULL "
+                    f"WHERE {name} IS NOT NULL AND JSON_VALID({name}) = 0"
+                ))
+                conn.execute(text(f"ALTER TABLE chat_histories MODIFY {name} JSON NULL"))
+            else:
+                conn.execute(text(
+                    f"ALTER TABLE chat_histories ALTER COLUMN {name} TYPE json USING {name}::json"
+                ))
+    print("✅ Migrasi kolom resep selesai.")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, Date, ForeignKey, Enum, Index, JSON
 from sqlalchemy.sql import func
 from app.database import Base
 from datetime import datetime
@@ -58,15 +58,35 @@ class Notification(Base):
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
+    __table_args__ = (
+        # verify_otp: WHERE email = ? AND otp = ?
+        Index("ix_password_reset_tokens_email_otp", "email", "otp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(120), nullable=False, index=True)
     otp = Column(String(6), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    # Sweeper: WHERE expires_at < now
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class OtpCode(Base):
+    """OTP WhatsApp aktif per nomor (dipakai `SqlOtpStore` saat uvicorn multi-worker)."""
+    __tablename__ = "otp_codes"
+
+    phone_number = Column(String(20), primary_key=True)
+    otp = Column(String(6), nullable=False)
+    # Sweeper: DELETE ... WHERE expires_at < now
+    expires_at = Column(DateTime, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
 
 
 class ChatHistory(Base):
     __tablename__ = "chat_histories"
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_chat_histories_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -74,6 +94,25 @@ class ChatHistory(Base):
     sender = Column(String(10), nullable=False)                        
     content = Column(Text, nullable=True)          
     recipe_name = Column(String(255), nullable=True)
-    ingredients = Column(Text, nullable=True)      
-    steps = Column(Text, nullable=True)         
-    created_at = Column(DateTime, default=func.now(), nullable=False)
\ No newline at end of file
+    # JSON native (MySQL/PostgreSQL); di SQLite tetap disimpan sebagai teks
+    ingredients = Column(JSON(none_as_null=True), nullable=True)
+    steps = Column(JSON(none_as_null=True), nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+class ChatHistoryDeletion(Base):
+    """
+    Tombstone + progres penghapusan riwayat chat di background.
+    Semua pesan user dengan id <= max_id dianggap sudah terhapus sejak job dibuat,
+    walaupun baris fisiknya masih dihapus bertahap per chunk.
+    """
+    __tablename__ = "chat_history_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    max_id = Column(Integer, nullable=False, default=0)
+    status = Column(String(10), nullable=False, default="pending")  # pending | running | done | failed
+    total = Column(Integer, nullable=False, default=0)
+    deleted = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True)
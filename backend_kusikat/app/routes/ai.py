@@ -1,13 +1,35 @@
 # app/routes/ai.py
-from fastapi import APIRouter, HTTPException, Header
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
 import httpx
+import time
 import os
+import hashlib
 import json
-import jwt
+import asyncio
 from dotenv import load_dotenv
 
-from app.schemas import RecipeRequest, RecipeResponse, ChatRequest, ChatResponse
+from app.schemas import (
+    RecipeRequest, RecipeResponse, ChatRequest, ChatResponse,
+    RecipeBatchRequest, RecipeBatchResult, RecipeBatchResponse
+)
+from app.utils.groq_client import get_groq_client, groq_metrics
+from app.utils import chat_search
+from app.utils.recipe_cache import recipe_cache, make_recipe_key, normalize_status
+from app.utils.singleflight import SingleFlight
+from app.utils.groq_scheduler import (
+    groq_scheduler, GroqOverloaded, GROQ_MAX_RETRIES, PRIORITY_CHAT, PRIORITY_RECIPE, PRIORITY_BACKGROUND
+)
+from app.utils.chat_context import chat_context_builder, ChatContext
+from app.utils.recipe_stream import IncrementalRecipeParser
+from app.utils.semantic_cache import semantic_cache, is_cacheable
+from app.utils.recipe_suggestions import recipe_suggestions, CONTAINER_ITEMS, DEFAULT_CONTAINER_ID
+from app.utils.offline_recipes import offline_recipes, GOOD_ENOUGH_SCORE
+from app.auth.jwt_handler import decode_access_token
+from app.database import SessionLocal
+from app.models import ChatHistory
 
 load_dotenv()
 
@@ -15,13 +37,18 @@ router = APIRouter()
 
 # === Groq Config ===
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+RECIPE_BATCH_CONCURRENCY = int(os.getenv("RECIPE_BATCH_CONCURRENCY", 5))
+# Setelah RECIPE_HEDGE_AFTER detik tanpa jawaban LLM, resep lokal yang cukup cocok
+# langsung dipakai; setelah RECIPE_LLM_BUDGET detik, resep lokal apa pun yang cocok.
+RECIPE_HEDGE_AFTER = float(os.getenv("RECIPE_HEDGE_AFTER", 2.0))
+RECIPE_LLM_BUDGET = float(os.getenv("RECIPE_LLM_BUDGET", 8.0))
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 DEFAULT_MODEL = "llama-3.1-8b-instant"
 
 if not GROQ_API_KEY:
     print("⚠️ WARNING: GROQ_API_KEY tidak ditemukan di .env")
 
-async def call_groq(prompt: str) -> str:
+def _groq_request(prompt: str, stream: bool = False):
     if not GROQ_API_KEY:
         raise HTTPException(status_code=500, detail="GROQ_API_KEY belum dikonfigurasi")
 
@@ -36,12 +63,41 @@ async def call_groq(prompt: str) -> str:
         "temperature": 0.7,
         "max_tokens": 600,
         "top_p": 1,
-        "stream": False
+        "stream": stream
     }
+    return headers, payload
 
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(GROQ_API_URL, json=payload, headers=headers)
+
+# Prompt identik yang sedang berjalan cukup satu panggilan ke Groq.
+# Kunci memuat prioritas: panggilan user tidak menumpang panggilan background
+# yang antre di slot prioritas rendah.
+groq_flight = SingleFlight("groq")
+recipe_flight = SingleFlight("recipe")
+
+
+async def call_groq(prompt: str, priority: int = PRIORITY_CHAT) -> str:
+    key = (priority, hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    return await groq_flight.do(key, lambda: _call_groq_upstream(prompt, priority))
+
+
+async def _call_groq_upstream(prompt: str, priority: int) -> str:
+    headers, payload = _groq_request(prompt)
+
+    client = get_groq_client()
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        trace, marks = groq_metrics.tracer()
+        started = time.perf_counter()
+        ok = False
+        try:
+            async with groq_scheduler.slot(priority):
+                response = await client.post(
+                    GROQ_API_URL, json=payload, headers=headers, extensions={"trace": trace}
+                )
+            if response.status_code == 429:
+                # Tahan semua dispatch sampai Retry-After, lalu coba lagi (antre ulang)
+                groq_scheduler.note_rate_limited(response.headers.get("Retry-After"), attempt)
+                if attempt < GROQ_MAX_RETRIES:
+                    continue
             if response.status_code != 200:
                 error_detail = response.json().get("error", {}).get("message", response.text)
                 raise HTTPException(
@@ -49,63 +105,272 @@ async def call_groq(prompt: str) -> str:
                     detail=f"Groq API error: {error_detail}"
                 )
             data = response.json()
+            ok = True
             return data["choices"][0]["message"]["content"]
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=500, detail=f"Koneksi ke Groq gagal: {str(e)}")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=500, detail=f"Koneksi ke Groq gagal: {str(e)}")
+        finally:
+            groq_metrics.observe(marks, time.perf_counter() - started, ok)
+
+
+async def stream_groq(prompt: str, priority: int = PRIORITY_CHAT) -> AsyncIterator[str]:
+    """
+    Versi streaming dari call_groq: parse SSE Groq (`data: {...}` per chunk,
+    diakhiri `data: [DONE]`) dan yield potongan teks begitu tiba.
+    Slot scheduler ditahan sampai stream selesai.
+    """
+    headers, payload = _groq_request(prompt, stream=True)
+
+    client = get_groq_client()
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        trace, marks = groq_metrics.tracer()
+        started = time.perf_counter()
+        first_token = True
+        ok = False
+        try:
+            async with groq_scheduler.slot(priority), client.stream(
+                "POST", GROQ_API_URL, json=payload, headers=headers, extensions={"trace": trace}
+            ) as response:
+                if response.status_code == 429:
+                    groq_scheduler.note_rate_limited(response.headers.get("Retry-After"), attempt)
+                    if attempt < GROQ_MAX_RETRIES:
+                        # Belum ada token yang dikirim, aman untuk diulang
+                        continue
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise HTTPException(
+                        status_code=response.status_code,
+                        detail=f"Groq API error: {body.decode(errors='replace')}"
+                    )
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or [{}]
+                    token = (choices[0].get("delta") or {}).get("content")
+                    if token:
+                        if first_token:
+                            groq_metrics.observe_first_token(time.perf_counter() - started)
+                            first_token = False
+                        yield token
+            ok = True
+            return
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=500, detail=f"Koneksi ke Groq gagal: {str(e)}")
+        finally:
+            groq_metrics.observe(marks, time.perf_counter() - started, ok)
+
+
+@router.get("/ai/metrics")
+def get_ai_metrics():
+    """Waktu koneksi vs latensi model, antrean scheduler, dan statistik cache resep."""
+    return {
+        "groq": groq_metrics.snapshot(),
+        "scheduler": groq_scheduler.stats(),
+        "recipe_cache": recipe_cache.stats(),
+        "chat_context": chat_context_builder.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "recipe_suggestions": recipe_suggestions.stats(),
+        "offline_recipes": offline_recipes.stats(),
+        "single_flight": {
+            "groq": groq_flight.stats(),
+            "recipe": recipe_flight.stats(),
+        },
+    }
 
 
 def get_user_name_from_token(authorization: Optional[str]) -> str:
-    """Ambil username dari token JWT (manual atau Google), fallback ke 'Pengguna'."""
+    """Ambil username dari token JWT yang TERVERIFIKASI, fallback ke 'Pengguna'."""
     if not authorization or not authorization.startswith("Bearer "):
         return "Pengguna"
 
     try:
-        token = authorization.split(" ")[1]
-        payload = jwt.decode(token, options={"verify_signature": False})
-        return payload.get("username", "Pengguna")
-    except Exception:
+        payload = decode_access_token(authorization.split(" ")[1])
+        return payload.get("username") or "Pengguna"
+    except HTTPException:
         return "Pengguna"
 
 
-@router.post("/ai/chat", response_model=ChatResponse)
-async def chat_with_ai(request: ChatRequest, authorization: Optional[str] = Header(None)):
-    time_hint = f"\n[{request.time_context}]" if request.time_context else ""
-    user_name = get_user_name_from_token(authorization)
+def get_user_id_from_token(authorization: Optional[str]) -> Optional[int]:
+    """Id user dari token JWT yang TERVERIFIKASI, atau None jika tidak valid."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        return decode_access_token(authorization.split(" ")[1]).get("id")
+    except HTTPException:
+        return None
 
-    prompt = (
+
+def build_chat_prompt(request: ChatRequest, user_name: str, context: Optional[ChatContext] = None) -> str:
+    # Pertanyaan yang bisa di-cache tidak bergantung waktu (lihat semantic_cache):
+    # time_context tidak dimasukkan supaya jawabannya sama untuk semua jam.
+    shareable = is_cacheable(request.message)
+    time_hint = f"\n[{request.time_context}]" if request.time_context and not shareable else ""
+    history = context.render() if context else ""
+    history = f"{history}\n\n" if history else ""
+    return (
         f"Kamu adalah JUNBOT, asisten AI yang cerdas, membantu, dan ramah dalam Bahasa Indonesia. "
         f"Kamu bisa menjawab berbagai pertanyaan — mulai dari resep masakan, tips harian, "
         f"penjelasan ilmiah sederhana, hingga saran praktis untuk kehidupan sehari-hari. "
         f"Selalu berikan jawaban yang jelas, ringkas, dan relevan. "
         f"Gunakan nama '{user_name}' jika sesuai untuk personalisasi. "
         f"{time_hint}\n\n"
+        f"{history}"
         f"Pertanyaan pengguna: {request.message}"
     )
-    
+
+
+def has_private_context(context: Optional[ChatContext]) -> bool:
+    """
+    Jawaban yang dibuat dengan riwayat/ringkasan user tidak boleh masuk
+    semantic_cache: cache dipakai bersama semua user. Nama user sudah diganti
+    placeholder oleh semantic_cache sendiri.
+    """
+    return bool(context and context.render())
+
+
+def _load_chat_context(user_id: int) -> Optional[ChatContext]:
+    db = SessionLocal()
     try:
-        reply = await call_groq(prompt)
-        return ChatResponse(reply=reply.strip())
+        return chat_context_builder.build(db, user_id)
+    except Exception as e:
+        print("Gagal memuat konteks chat:", str(e))
+        return None
+    finally:
+        db.close()
+
+
+async def get_chat_context(user_id: Optional[int]) -> Optional[ChatContext]:
+    """Giliran terakhir + ringkasan dalam anggaran token; ringkasan diperbarui di background."""
+    if not user_id:
+        return None
+    context = await run_in_threadpool(_load_chat_context, user_id)
+    if context is not None:
+        chat_context_builder.schedule_refresh(
+            user_id, context, lambda prompt: call_groq(prompt, PRIORITY_BACKGROUND)
+        )
+    return context
+
+
+def _save_chat_exchange(user_id: int, question: str, reply: str) -> int:
+    """Simpan pesan user + balasan bot dalam satu transaksi, kembalikan id balasan."""
+    db = SessionLocal()
+    try:
+        rows = [
+            ChatHistory(user_id=user_id, message_type="text", sender="user", content=question),
+            ChatHistory(user_id=user_id, message_type="text", sender="bot", content=reply),
+        ]
+        db.add_all(rows)
+        db.flush()
+        chat_search.index_messages(db, rows)
+        db.commit()
+        return rows[1].id
+    finally:
+        db.close()
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ai/chat", response_model=ChatResponse)
+async def chat_with_ai(request: ChatRequest, authorization: Optional[str] = Header(None)):
+    user_name = get_user_name_from_token(authorization)
+    # Pertanyaan yang mirip (bukan hanya identik) dijawab dari cache lokal,
+    # sebelum query riwayat user
+    cached = semantic_cache.get(request.message, user_name)
+    if cached is not None:
+        return ChatResponse(reply=cached)
+
+    context = await get_chat_context(get_user_id_from_token(authorization))
+    prompt = build_chat_prompt(request, user_name, context)
+
+    try:
+        reply = (await call_groq(prompt)).strip()
+        if not has_private_context(context):
+            semantic_cache.put(request.message, reply, user_name)
+        return ChatResponse(reply=reply)
+    except GroqOverloaded:
+        raise
     except Exception as e:
         print("Chat Error:", str(e))
         return ChatResponse(reply="Maaf, saya sedang tidak bisa merespons. Coba lagi nanti.")
 
 
-@router.post("/ai/generate-recipe", response_model=RecipeResponse)
-async def generate_recipe(request: RecipeRequest, authorization: Optional[str] = Header(None)):
+@router.post("/ai/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest, authorization: Optional[str] = Header(None)):
+    """
+    Seperti /ai/chat tapi token dikirim ke browser lewat Server-Sent Events
+    begitu diterima dari Groq:
+        data: {"token": "..."}            (berulang)
+        event: done  data: {"reply": "...", "id": <id balasan atau null>}
+        event: error data: {"reply": "<pesan fallback>"}
+    Jika token valid, pertanyaan + balasan lengkap disimpan ke chat_histories.
+    """
     user_name = get_user_name_from_token(authorization)
+    user_id = get_user_id_from_token(authorization)
+    cached = semantic_cache.get(request.message, user_name)
+    if cached is None:
+        context = await get_chat_context(user_id)
+        prompt = build_chat_prompt(request, user_name, context)
+        # 503 sebelum header SSE terkirim; setelah itu error hanya bisa lewat event
+        groq_scheduler.check_admission(PRIORITY_CHAT)
+
+    async def event_stream():
+        if cached is not None:
+            parts = [cached]
+            yield _sse({"token": cached})
+        else:
+            parts = []
+            try:
+                async for token in stream_groq(prompt):
+                    parts.append(token)
+                    yield _sse({"token": token})
+            except Exception as e:
+                print("Chat Stream Error:", str(e))
+                yield _sse({"reply": "Maaf, saya sedang tidak bisa merespons. Coba lagi nanti."}, event="error")
+                return
+            if not has_private_context(context):
+                semantic_cache.put(request.message, "".join(parts).strip(), user_name)
+
+        reply = "".join(parts).strip()
+        message_id = None
+        if user_id and reply:
+            try:
+                message_id = await run_in_threadpool(_save_chat_exchange, user_id, request.message, reply)
+            except Exception as e:
+                print("Gagal simpan chat stream:", str(e))
+        yield _sse({"reply": reply, "id": message_id}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+ROTTEN_RECIPE = {
+    "recipe_name": "🚫 Tidak Layak Konsumsi",
+    "ingredients": ["Makanan busuk", "Wadah kompos organik"],
+    "steps": [
+        "Jangan dikonsumsi dalam kondisi apapun.",
+        "Masukkan ke dalam tempat kompos.",
+        "Tutup rapat untuk hindari bau tidak sedap."
+    ],
+}
+
+FAILED_RECIPE = {
+    "recipe_name": "⚠️ Gagal Generate Resep",
+    "ingredients": ["Maaf, saya tidak bisa membuat resep saat ini."],
+    "steps": ["Silakan coba dengan bahan lain atau tanyakan sesuatu yang berbeda."],
+}
 
-    # Jika item sudah busuk
-    if request.freshness_status == "Busuk":
-        return RecipeResponse(
-            recipe_name="🚫 Tidak Layak Konsumsi",
-            ingredients=["Makanan busuk", "Wadah kompos organik"],
-            steps=[
-                "Jangan dikonsumsi dalam kondisi apapun.",
-                "Masukkan ke dalam tempat kompos.",
-                "Tutup rapat untuk hindari bau tidak sedap."
-            ]
-        )
 
+def build_recipe_prompt(request: RecipeRequest, user_name: str) -> str:
     # Format data sensor (opsional)
     temp_str = f"{request.temperature}°C" if request.temperature is not None else "tidak diketahui"
     hum_str = f"{request.humidity}%" if request.humidity is not None else "tidak diketahui"
@@ -114,7 +379,7 @@ async def generate_recipe(request: RecipeRequest, authorization: Optional[str] =
 
     food_item = request.food_item or "bahan makanan ini"
 
-    prompt = f"""
+    return f"""
 Hai Chef! Kamu sedang membantu {user_name} yang ingin memasak atau menggunakan **{food_item}**.
 
 Status kesegaran: "{request.freshness_status}". {estimated_str}
@@ -137,31 +402,249 @@ Instruksi:
 }}
 """
 
+
+def parse_recipe_json(response_text: str) -> dict:
+    # Coba ekstrak JSON dari respons (beberapa model menyisipkan penjelasan)
     try:
-        response_text = await call_groq(prompt)
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        start = response_text.find("{")
+        end = response_text.rfind("}") + 1
+        if start != -1 and end > start:
+            json_str = response_text[start:end]
+            data = json.loads(json_str)
+        else:
+            raise ValueError("Tidak ada JSON valid dalam respons")
 
-        # Coba ekstrak JSON dari respons (beberapa model menyisipkan penjelasan)
-        try:
-            data = json.loads(response_text)
-        except json.JSONDecodeError:
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start != -1 and end > start:
-                json_str = response_text[start:end]
-                data = json.loads(json_str)
-            else:
-                raise ValueError("Tidak ada JSON valid dalam respons")
+    required_keys = {"recipe_name", "ingredients", "steps"}
+    if not required_keys.issubset(data.keys()):
+        raise ValueError("Field JSON tidak lengkap")
 
-        required_keys = {"recipe_name", "ingredients", "steps"}
-        if not required_keys.issubset(data.keys()):
-            raise ValueError("Field JSON tidak lengkap")
+    return RecipeResponse(**data).model_dump(include=required_keys)
 
-        return RecipeResponse(**data)
 
+def recipe_cache_key(request: RecipeRequest):
+    return make_recipe_key(
+        request.food_item,
+        request.freshness_status,
+        request.temperature,
+        request.humidity,
+        request.voc,
+        request.estimated_days_left,
+    )
+
+
+def is_rotten(request: RecipeRequest) -> bool:
+    return normalize_status(request.freshness_status) == "busuk"
+
+
+async def generate_recipe_data(request: RecipeRequest, user_name: str,
+                               priority: int = PRIORITY_RECIPE, use_cache: bool = True) -> dict:
+    """Resep tervalidasi (dict) untuk satu bahan; melempar exception jika gagal."""
+    # Jika item sudah busuk
+    if is_rotten(request):
+        return ROTTEN_RECIPE
+
+    # Kombinasi bahan + status + sensor (dibulatkan) sering berulang antar user.
+    # Sapaan nama user di prompt tidak masuk kunci: hasil yang dipakai hanya JSON resep.
+    cache_key = recipe_cache_key(request)
+    if use_cache:
+        # Resep yang sudah disiapkan saat status wadah berubah
+        suggested = recipe_suggestions.get(DEFAULT_CONTAINER_ID, request.food_item, request.freshness_status)
+        if suggested is not None:
+            return suggested
+        cached = recipe_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    prompt = build_recipe_prompt(request, user_name)
+
+    async def generate():
+        data = parse_recipe_json(await call_groq(prompt, priority))
+        recipe_cache.put(cache_key, data)
+        return data
+
+    # Banyak tab/user meminta resep untuk kondisi yang sama saat status berubah:
+    # digabung per kunci cache (bukan per prompt, karena prompt memuat nama user).
+    # Prioritas ikut kunci supaya request user tidak menumpang job background
+    # yang antre di belakang chat dan precompute lain.
+    return await recipe_flight.do((priority, cache_key), generate)
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def generate_recipe_with_fallback(request: RecipeRequest, user_name: str) -> dict:
+    """
+    generate_recipe_data dengan batas waktu ketat + hedging ke indeks resep lokal.
+    Panggilan LLM tidak dibatalkan saat resep lokal dipakai: hasilnya tetap
+    masuk recipe_cache untuk request berikutnya.
+    """
+    if is_rotten(request):
+        return ROTTEN_RECIPE
+
+    task = asyncio.ensure_future(generate_recipe_data(request, user_name))
+    task.add_done_callback(_consume_exception)
+
+    done, _ = await asyncio.wait({task}, timeout=RECIPE_HEDGE_AFTER)
+    if not done:
+        local = offline_recipes.best(request.food_item, request.freshness_status, GOOD_ENOUGH_SCORE)
+        if local is not None:
+            offline_recipes.record("hedge")
+            return local
+        done, _ = await asyncio.wait({task}, timeout=max(0.0, RECIPE_LLM_BUDGET - RECIPE_HEDGE_AFTER))
+
+    if done and task.exception() is None:
+        return task.result()
+
+    error = task.exception() if done else None
+    local = offline_recipes.best(request.food_item, request.freshness_status)
+    if local is not None:
+        offline_recipes.record("error" if error else "timeout")
+        return local
+    if error is not None:
+        raise error
+    raise TimeoutError("Groq tidak menjawab dalam batas waktu resep")
+
+
+@router.post("/ai/generate-recipe", response_model=RecipeResponse)
+async def generate_recipe(
+    request: RecipeRequest,
+    authorization: Optional[str] = Header(None),
+    refresh: bool = Query(False, description="Abaikan resep tersimpan dan buat ulang")
+):
+    user_name = get_user_name_from_token(authorization)
+
+    try:
+        if refresh:
+            data = await generate_recipe_data(request, user_name, use_cache=False)
+            recipe_suggestions.put(DEFAULT_CONTAINER_ID, request.food_item, request.freshness_status, data)
+        else:
+            data = await generate_recipe_with_fallback(request, user_name)
+        return RecipeResponse(**data)
+    except GroqOverloaded:
+        raise
     except Exception as e:
         print("Resep Error:", str(e))
-        return RecipeResponse(
-            recipe_name="⚠️ Gagal Generate Resep",
-            ingredients=["Maaf, saya tidak bisa membuat resep saat ini."],
-            steps=["Silakan coba dengan bahan lain atau tanyakan sesuatu yang berbeda."]
-        )
\ No newline at end of file
+        return RecipeResponse(**FAILED_RECIPE)
+
+
+async def precompute_container_recipes(container_id: int, status: str, temperature: float,
+                                      humidity: float, voc: float, user_name: str) -> int:
+    """Siapkan resep untuk semua isi wadah pada status baru, simpan sebagai saran."""
+    stored = 0
+    for food_item in CONTAINER_ITEMS:
+        request = RecipeRequest(
+            food_item=food_item,
+            freshness_status=status.replace("_", " "),
+            temperature=temperature,
+            humidity=humidity,
+            voc=voc,
+        )
+        data = await generate_recipe_data(request, user_name, priority=PRIORITY_BACKGROUND, use_cache=False)
+        recipe_suggestions.put(container_id, food_item, status, data)
+        stored += 1
+    return stored
+
+
+def schedule_recipe_precompute(container_id: int, status: str, temperature: float,
+                               humidity: float, voc: float, user_name: str) -> bool:
+    """Dipanggil dari create_sensor_data (thread endpoint sync) saat status berubah."""
+    return recipe_suggestions.submit(
+        container_id,
+        lambda: precompute_container_recipes(container_id, status, temperature, humidity, voc, user_name)
+    )
+
+
+@router.post("/ai/generate-recipes", response_model=RecipeBatchResponse)
+async def generate_recipes(request: RecipeBatchRequest, authorization: Optional[str] = Header(None)):
+    """
+    Resep untuk beberapa bahan sekaligus (mis. satu wadah berisi banyak sayuran).
+    Item busuk dijawab lokal, sisanya ke Groq bersamaan (maks RECIPE_BATCH_CONCURRENCY);
+    hasil berurutan sesuai input, error per item tidak menggagalkan item lain.
+    """
+    user_name = get_user_name_from_token(authorization)
+    semaphore = asyncio.Semaphore(RECIPE_BATCH_CONCURRENCY)
+
+    async def one(item: RecipeRequest) -> RecipeBatchResult:
+        try:
+            if is_rotten(item):
+                data = ROTTEN_RECIPE
+            else:
+                async with semaphore:
+                    data = await generate_recipe_with_fallback(item, user_name)
+            return RecipeBatchResult(food_item=item.food_item, recipe=RecipeResponse(**data))
+        except GroqOverloaded as e:
+            return RecipeBatchResult(food_item=item.food_item, error=e.detail)
+        except Exception as e:
+            print("Resep Error:", str(e))
+            return RecipeBatchResult(food_item=item.food_item, error="Gagal generate resep untuk bahan ini.")
+
+    results = await asyncio.gather(*(one(item) for item in request.items))
+    return RecipeBatchResponse(results=results)
+
+
+@router.post("/ai/generate-recipe/stream")
+async def generate_recipe_stream(request: RecipeRequest, authorization: Optional[str] = Header(None)):
+    """
+    Seperti /ai/generate-recipe tapi bagian resep dikirim lewat Server-Sent Events
+    begitu lengkap secara sintaks di output model:
+        event: recipe_name  data: {"recipe_name": "..."}
+        event: ingredient   data: {"index": 0, "ingredient": "..."}   (berulang)
+        event: step         data: {"index": 0, "step": "..."}         (berulang)
+        event: done         data: {<RecipeResponse tervalidasi>}
+        event: error        data: {<resep fallback>}
+    Hasil akhir di `done` yang berlaku (sudah divalidasi RecipeResponse).
+    """
+    user_name = get_user_name_from_token(authorization)
+
+    if is_rotten(request):
+        ready = ROTTEN_RECIPE
+    else:
+        cache_key = recipe_cache_key(request)
+        ready = recipe_cache.get(cache_key)
+        if ready is None:
+            groq_scheduler.check_admission(PRIORITY_RECIPE)
+
+    def recipe_events(recipe: dict):
+        yield _sse({"recipe_name": recipe["recipe_name"]}, event="recipe_name")
+        for index, item in enumerate(recipe["ingredients"]):
+            yield _sse({"index": index, "ingredient": item}, event="ingredient")
+        for index, item in enumerate(recipe["steps"]):
+            yield _sse({"index": index, "step": item}, event="step")
+        yield _sse(recipe, event="done")
+
+    async def event_stream():
+        if ready is not None:
+            for event in recipe_events(ready):
+                yield event
+            return
+
+        parser = IncrementalRecipeParser()
+        counts = {"ingredient": 0, "step": 0}
+        parts = []
+        try:
+            async for token in stream_groq(build_recipe_prompt(request, user_name), PRIORITY_RECIPE):
+                parts.append(token)
+                for kind, value in parser.feed(token):
+                    if kind == "recipe_name":
+                        yield _sse({"recipe_name": value}, event="recipe_name")
+                    else:
+                        yield _sse({"index": counts[kind], kind: value}, event=kind)
+                        counts[kind] += 1
+            data = parse_recipe_json("".join(parts))
+        except Exception as e:
+            print("Resep Stream Error:", str(e))
+            yield _sse(FAILED_RECIPE, event="error")
+            return
+
+        recipe_cache.put(cache_key, data)
+        yield _sse(data, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
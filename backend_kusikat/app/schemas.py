@@ -119,6 +119,20 @@ class RecipeResponse(BaseModel):
     estimated_days_left: Optional[float] = None
 
 
+class RecipeBatchRequest(BaseModel):
+    items: List[RecipeRequest] = Field(..., min_length=1, max_length=10)
+
+
+class RecipeBatchResult(BaseModel):
+    food_item: str
+    recipe: Optional[RecipeResponse] = None
+    error: Optional[str] = None
+
+
+class RecipeBatchResponse(BaseModel):
+    results: List[RecipeBatchResult]
+
+
 class ChatMessageBase(BaseModel):
     message_type: MessageType
     sender: SenderType
@@ -140,12 +154,31 @@ class ChatMessage(ChatMessageBase):
     model_config = {"from_attributes": True}
 
 
+class ChatSearchHit(ChatMessage):
+    score: float
+
+
 class ChatHistoryRequest(BaseModel):
-    messages: List[ChatMessageCreate]
+    messages: List[ChatMessageCreate] = Field(..., min_length=1, max_length=50)
+
+
+class ChatHistoryBulkResponse(BaseModel):
+    ids: List[int]
 
 
 class ClearChatHistoryResponse(BaseModel):
     message: str = "Riwayat chat berhasil dihapus"
+    job_id: Optional[int] = None
+    status: Optional[str] = None
+
+
+class ChatDeletionStatus(BaseModel):
+    job_id: int
+    status: str
+    total: int
+    deleted: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
 
 
 class NotificationResponse(BaseModel):
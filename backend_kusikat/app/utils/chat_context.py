@@ -0,0 +1,226 @@
+# app/utils/chat_context.py
+"""
+Konteks percakapan JUNBOT dari chat_histories dengan anggaran token.
+
+- Giliran terbaru dimasukkan (dari yang paling baru) selama muat di
+  CHAT_CONTEXT_TOKEN_BUDGET, memakai estimasi token lokal (tanpa tokenizer model).
+- Giliran yang lebih lama diwakili ringkasan bergulir (rolling summary) yang
+  di-cache per user. Ringkasan hanya diperbarui secara inkremental
+  (ringkasan lama + giliran yang baru tergeser) dan di background, supaya
+  request chat tidak menunggu panggilan ringkasan.
+- Giliran yang sudah keluar dari jendela max_turns tapi belum tercakup
+  ringkasan diringkas bertahap per CHAT_SUMMARY_CHUNK_TURNS, dari yang
+  paling lama, jadi tidak ada giliran yang hilang dari memori percakapan.
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import ChatHistory, ChatHistoryDeletion
+
+load_dotenv()
+
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", 1200))
+CHAT_CONTEXT_MAX_TURNS = int(os.getenv("CHAT_CONTEXT_MAX_TURNS", 40))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", 250))
+CHAT_SUMMARY_MIN_TURNS = int(os.getenv("CHAT_SUMMARY_MIN_TURNS", 6))
+CHAT_SUMMARY_CACHE_USERS = int(os.getenv("CHAT_SUMMARY_CACHE_USERS", 1024))
+# Maksimal giliran lama (di luar jendela max_turns) per satu panggilan ringkasan
+CHAT_SUMMARY_CHUNK_TURNS = int(os.getenv("CHAT_SUMMARY_CHUNK_TURNS", 60))
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(value: Optional[str]) -> int:
+    """
+    Perkiraan cepat jumlah token BPE: tanda baca = 1 token, kata dipecah
+    per ~4 karakter. Sedikit melebihkan, jadi aman untuk anggaran.
+    """
+    if not value:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _PIECE_RE.findall(value))
+
+
+def format_turn(row) -> Optional[str]:
+    speaker = "Pengguna" if row.sender == "user" else "JUNBOT"
+    if row.content:
+        return f"{speaker}: {row.content.strip()}"
+    if row.recipe_name:
+        return f"{speaker}: [Resep: {row.recipe_name}]"
+    return None
+
+
+class _Summary:
+    __slots__ = ("text", "upto_id", "cutoff_id")
+
+    def __init__(self, text: str, upto_id: int, cutoff_id: int):
+        self.text = text
+        self.upto_id = upto_id      # pesan dengan id <= ini sudah tercakup
+        self.cutoff_id = cutoff_id  # tombstone hapus riwayat saat ringkasan dibuat
+
+
+class ChatContext:
+    __slots__ = ("summary", "turns", "tokens", "pending", "cutoff_id")
+
+    def __init__(self, summary: Optional[str], turns: List[str], tokens: int,
+                 pending: list, cutoff_id: int):
+        self.summary = summary
+        self.turns = turns
+        self.tokens = tokens
+        # Baris lama yang tergeser dan belum tercakup ringkasan
+        # (kosong jika belum cukup banyak untuk diringkas ulang)
+        self.pending = pending
+        self.cutoff_id = cutoff_id
+
+    def render(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"Ringkasan percakapan sebelumnya:\n{self.summary}")
+        if self.turns:
+            parts.append("Percakapan terakhir:\n" + "\n".join(self.turns))
+        return "\n\n".join(parts)
+
+
+class ChatContextBuilder:
+    def __init__(self, budget: int = CHAT_CONTEXT_TOKEN_BUDGET, max_turns: int = CHAT_CONTEXT_MAX_TURNS,
+                 min_summary_turns: int = CHAT_SUMMARY_MIN_TURNS, max_users: int = CHAT_SUMMARY_CACHE_USERS,
+                 summary_chunk: int = CHAT_SUMMARY_CHUNK_TURNS):
+        self.budget = budget
+        self.max_turns = max_turns
+        self.min_summary_turns = min_summary_turns
+        self.summary_chunk = summary_chunk
+        self.max_users = max_users
+        self._summaries = OrderedDict()  # user_id -> _Summary (LRU)
+        self._refreshing = set()
+        self._tasks = set()  # referensi kuat: loop hanya menyimpan weakref ke task
+        self._lock = threading.Lock()
+        self.summary_refreshes = 0
+        self.summary_errors = 0
+
+    def _get_summary(self, user_id: int, cutoff_id: int) -> Optional[_Summary]:
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return None
+            if summary.cutoff_id != cutoff_id:
+                # Riwayat dihapus sejak ringkasan dibuat
+                del self._summaries[user_id]
+                return None
+            self._summaries.move_to_end(user_id)
+            return summary
+
+    def _put_summary(self, user_id: int, summary: _Summary) -> None:
+        with self._lock:
+            self._summaries[user_id] = summary
+            self._summaries.move_to_end(user_id)
+            while len(self._summaries) > self.max_users:
+                self._summaries.popitem(last=False)
+
+    def build(self, db: Session, user_id: int) -> ChatContext:
+        cutoff_id = db.query(func.max(ChatHistoryDeletion.max_id)).filter(
+            ChatHistoryDeletion.user_id == user_id
+        ).scalar() or 0
+        summary = self._get_summary(user_id, cutoff_id)
+        after_id = max(cutoff_id, summary.upto_id if summary else 0)
+
+        columns = (ChatHistory.id, ChatHistory.sender, ChatHistory.content, ChatHistory.recipe_name)
+        rows = db.query(*columns).filter(
+            ChatHistory.user_id == user_id, ChatHistory.id > after_id
+        ).order_by(ChatHistory.id.desc()).limit(self.max_turns).all()
+
+        summary_text = summary.text if summary else None
+        used = estimate_tokens(summary_text)
+        turns = []
+        overflow = []
+        for row in rows:  # terbaru dulu
+            line = format_turn(row)
+            if line is None:
+                continue
+            cost = estimate_tokens(line) + 1
+            if overflow or used + cost > self.budget:
+                overflow.append(row)
+                continue
+            turns.append(line)
+            used += cost
+
+        turns.reverse()
+        overflow.reverse()
+
+        # Jendela penuh: mungkin ada giliran lebih lama yang belum diringkas.
+        # pending harus bersambung dari after_id (upto_id = id terakhir pending).
+        backlog = []
+        if len(rows) == self.max_turns:
+            backlog = db.query(*columns).filter(
+                ChatHistory.user_id == user_id,
+                ChatHistory.id > after_id,
+                ChatHistory.id < rows[-1].id,
+            ).order_by(ChatHistory.id).limit(self.summary_chunk + 1).all()
+            if len(backlog) > self.summary_chunk:
+                # Masih ada sisa di antara chunk dan jendela: overflow menyusul
+                backlog = backlog[:self.summary_chunk]
+                overflow = []
+        candidates = backlog + overflow
+        pending = candidates if len(candidates) >= self.min_summary_turns else []
+        return ChatContext(summary_text, turns, used, pending, cutoff_id)
+
+    async def refresh_summary(self, user_id: int, context: ChatContext,
+                              summarize: Callable[[str], Awaitable[str]]) -> None:
+        """Gabungkan ringkasan lama + giliran yang tergeser menjadi ringkasan baru."""
+        with self._lock:
+            if user_id in self._refreshing:
+                return
+            self._refreshing.add(user_id)
+        try:
+            previous = self._get_summary(user_id, context.cutoff_id)
+            lines = [line for line in (format_turn(row) for row in context.pending) if line]
+            prompt = (
+                "Ringkas percakapan antara Pengguna dan JUNBOT berikut dalam Bahasa Indonesia, "
+                f"maksimal {CHAT_SUMMARY_MAX_TOKENS // 2} kata. Pertahankan fakta penting tentang "
+                "pengguna (nama, preferensi, bahan yang dimiliki) dan topik yang sedang dibahas. "
+                "Keluarkan ringkasannya saja.\n\n"
+                + (f"Ringkasan sebelumnya:\n{previous.text}\n\n" if previous else "")
+                + "Percakapan lanjutan:\n" + "\n".join(lines)
+            )
+            text = (await summarize(prompt)).strip()
+            if estimate_tokens(text) > CHAT_SUMMARY_MAX_TOKENS:
+                words = text.split()
+                text = " ".join(words[:CHAT_SUMMARY_MAX_TOKENS // 2]) + " …"
+            self._put_summary(user_id, _Summary(text, context.pending[-1].id, context.cutoff_id))
+            self.summary_refreshes += 1
+        except Exception as e:
+            self.summary_errors += 1
+            print("Gagal meringkas riwayat chat:", str(e))
+        finally:
+            with self._lock:
+                self._refreshing.discard(user_id)
+
+    def schedule_refresh(self, user_id: int, context: ChatContext,
+                         summarize: Callable[[str], Awaitable[str]]) -> None:
+        if context.pending and user_id not in self._refreshing:
+            task = asyncio.ensure_future(self.refresh_summary(user_id, context, summarize))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "token_budget": self.budget,
+            "cached_summaries": len(self._summaries),
+            "summary_refreshes": self.summary_refreshes,
+            "summary_errors": self.summary_errors,
+        }
+
+
+chat_context_builder = ChatContextBuilder()
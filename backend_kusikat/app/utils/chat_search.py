@@ -0,0 +1,297 @@
+# app/utils/chat_search.py
+"""
+Indeks full-text untuk riwayat chat & resep (content, recipe_name, ingredients, steps).
+
+Backend dipilih sesuai dialect database:
+- SQLite  : virtual table FTS5 `chat_search_fts`, ranking bm25()
+- MySQL   : tabel `chat_search_docs` + FULLTEXT index, ranking MATCH ... AGAINST
+- lainnya : inverted index in-process (BM25), dibangun lazy per user lalu
+            dikejar (catch-up) dari id terakhir yang sudah terindeks
+
+Indeks diperbarui di transaksi yang sama dengan insert pesan (lihat main.py).
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+MAX_QUERY_TOKENS = 10
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(value: str) -> List[str]:
+    return _TOKEN_RE.findall(value.lower()) if value else []
+
+
+def build_document(content: Optional[str], recipe_name: Optional[str],
+                   ingredients: Optional[Iterable[str]], steps: Optional[Iterable[str]]) -> str:
+    parts = [content or "", recipe_name or ""]
+    parts.extend(ingredients or [])
+    parts.extend(steps or [])
+    return " ".join(p for p in parts if p)
+
+
+class _SQLiteFTS5Backend:
+    """
+    rowid FTS5 = id pesan, jadi hapus/filter per id memakai lookup rowid
+    (bukan scan kolom UNINDEXED). User disimpan sebagai token `u<id>` di kolom
+    `user_key` yang ikut terindeks, sehingga MATCH hanya membaca posting user itu.
+    """
+    name = "sqlite_fts5"
+
+    def setup(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            existing = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'chat_search_fts'"
+            )).scalar()
+            if existing and "user_key" in existing:
+                return
+            if existing:
+                # Skema lama (message_id/user_id UNINDEXED): bangun ulang
+                conn.execute(text("DROP TABLE chat_search_fts"))
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+                "body, user_key, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+            # Backfill sekali saat tabel indeks baru dibuat
+            conn.execute(text(
+                "INSERT INTO chat_search_fts (rowid, body, user_key) "
+                "SELECT id, COALESCE(content, '') || ' ' || COALESCE(recipe_name, '') || ' ' || "
+                "COALESCE(ingredients, '') || ' ' || COALESCE(steps, ''), 'u' || user_id "
+                "FROM chat_histories"
+            ))
+
+    def index(self, db: Session, docs: List[Tuple[int, int, str]]) -> None:
+        db.execute(
+            text("INSERT INTO chat_search_fts (rowid, body, user_key) VALUES (:message_id, :body, :user_key)"),
+            [{"message_id": mid, "user_key": f"u{uid}", "body": body} for mid, uid, body in docs]
+        )
+
+    def remove(self, db: Session, ids: List[int]) -> None:
+        db.execute(
+            text("DELETE FROM chat_search_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(ids)}
+        )
+
+    def search(self, db: Session, user_id: int, tokens: List[str], min_id: int,
+               limit: int, offset: int) -> List[Tuple[int, float]]:
+        # Setiap token di-quote (aman dari sintaks FTS5) + prefix match, digabung OR;
+        # dokumen yang cocok dengan lebih banyak token otomatis lebih tinggi di bm25.
+        terms = " OR ".join(f'"{t}"*' for t in tokens)
+        match = f'user_key : "u{int(user_id)}" AND body : ({terms})'
+        rows = db.execute(text(
+            "SELECT rowid AS message_id, bm25(chat_search_fts, 1.0, 0.0) AS score FROM chat_search_fts "
+            "WHERE chat_search_fts MATCH :match AND rowid > :min_id "
+            "ORDER BY score LIMIT :limit OFFSET :offset"
+        ), {"match": match, "min_id": min_id, "limit": limit, "offset": offset}).all()
+        # bm25() di SQLite bernilai negatif (lebih kecil = lebih relevan)
+        return [(int(r.message_id), -float(r.score)) for r in rows]
+
+
+class _MySQLFulltextBackend:
+    name = "mysql_fulltext"
+
+    def setup(self, engine: Engine) -> None:
+        if inspect(engine).has_table("chat_search_docs"):
+            return
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE chat_search_docs ("
+                "message_id INT PRIMARY KEY, "
+                "user_id INT NOT NULL, "
+                "body TEXT NOT NULL, "
+                "INDEX ix_chat_search_docs_user_id (user_id), "
+                "FULLTEXT INDEX ft_chat_search_docs_body (body)"
+                ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+            ))
+            conn.execute(text(
+                "INSERT INTO chat_search_docs (message_id, user_id, body) "
+                "SELECT id, user_id, CONCAT_WS(' ', content, recipe_name, ingredients, steps) "
+                "FROM chat_histories"
+            ))
+
+    def index(self, db: Session, docs: List[Tuple[int, int, str]]) -> None:
+        db.execute(
+            text("INSERT INTO chat_search_docs (message_id, user_id, body) VALUES (:message_id, :user_id, :body)"),
+            [{"message_id": mid, "user_id": uid, "body": body} for mid, uid, body in docs]
+        )
+
+    def remove(self, db: Session, ids: List[int]) -> None:
+        db.execute(
+            text("DELETE FROM chat_search_docs WHERE message_id = :message_id"),
+            [{"message_id": mid} for mid in ids]
+        )
+
+    def search(self, db: Session, user_id: int, tokens: List[str], min_id: int,
+               limit: int, offset: int) -> List[Tuple[int, float]]:
+        query = " ".join(tokens)
+        rows = db.execute(text(
+            "SELECT message_id, MATCH(body) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score "
+            "FROM chat_search_docs "
+            "WHERE user_id = :user_id AND message_id > :min_id "
+            "AND MATCH(body) AGAINST (:q IN NATURAL LANGUAGE MODE) "
+            "ORDER BY score DESC LIMIT :limit OFFSET :offset"
+        ), {"q": query, "user_id": user_id, "min_id": min_id, "limit": limit, "offset": offset}).all()
+        return [(int(r.message_id), float(r.score)) for r in rows]
+
+
+class _UserIndex:
+    def __init__(self):
+        self.postings = {}     # token -> {message_id: tf}
+        self.doc_len = {}      # message_id -> jumlah token
+        self.doc_tokens = {}   # message_id -> Counter
+        self.last_id = 0       # id terakhir yang sudah dikejar dari database
+
+    def add(self, message_id: int, body: str) -> None:
+        if message_id in self.doc_tokens:
+            return
+        counts = Counter(tokenize(body))
+        self.doc_tokens[message_id] = counts
+        self.doc_len[message_id] = sum(counts.values())
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[message_id] = tf
+
+    def remove(self, message_id: int) -> None:
+        counts = self.doc_tokens.pop(message_id, None)
+        if counts is None:
+            return
+        self.doc_len.pop(message_id, None)
+        for token in counts:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(message_id, None)
+                if not posting:
+                    del self.postings[token]
+
+    def search(self, tokens: List[str], min_id: int, k1: float = 1.2, b: float = 0.75) -> List[Tuple[int, float]]:
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return []
+        avg_len = sum(self.doc_len.values()) / n_docs
+        scores = {}
+        for query_token in tokens:
+            # prefix match seperti FTS5 "token"*
+            matched = [t for t in self.postings if t.startswith(query_token)]
+            for token in matched:
+                posting = self.postings[token]
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for message_id, tf in posting.items():
+                    if message_id <= min_id:
+                        continue
+                    norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * self.doc_len[message_id] / avg_len))
+                    scores[message_id] = scores.get(message_id, 0.0) + idf * norm
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+class _InMemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_users: int = 256):
+        self.max_users = max_users
+        self.users = OrderedDict()  # user_id -> _UserIndex (LRU)
+        self.lock = threading.Lock()
+
+    def setup(self, engine: Engine) -> None:
+        pass
+
+    def _catch_up(self, db: Session, user_id: int) -> _UserIndex:
+        # Import lokal untuk hindari import melingkar app.models <-> utils
+        from app.models import ChatHistory
+
+        with self.lock:
+            user_index = self.users.get(user_id)
+            if user_index is None:
+                user_index = _UserIndex()
+                self.users[user_id] = user_index
+                while len(self.users) > self.max_users:
+                    self.users.popitem(last=False)
+            self.users.move_to_end(user_id)
+            last_id = user_index.last_id
+
+        rows = db.query(
+            ChatHistory.id, ChatHistory.content, ChatHistory.recipe_name, ChatHistory.ingredients, ChatHistory.steps
+        ).filter(ChatHistory.user_id == user_id, ChatHistory.id > last_id).order_by(ChatHistory.id).all()
+
+        with self.lock:
+            for row in rows:
+                user_index.add(row.id, build_document(row.content, row.recipe_name, row.ingredients, row.steps))
+            if rows:
+                user_index.last_id = max(user_index.last_id, rows[-1].id)
+        return user_index
+
+    def index(self, db: Session, docs: List[Tuple[int, int, str]]) -> None:
+        with self.lock:
+            for message_id, user_id, body in docs:
+                user_index = self.users.get(user_id)
+                # User yang belum dimuat akan dibangun lengkap saat pencarian pertama.
+                # last_id tidak dimajukan di sini: pesan dari worker lain tetap
+                # terambil saat catch-up berikutnya.
+                if user_index is not None:
+                    user_index.add(message_id, body)
+
+    def remove(self, db: Session, ids: List[int]) -> None:
+        with self.lock:
+            for user_index in self.users.values():
+                for message_id in ids:
+                    user_index.remove(message_id)
+
+    def search(self, db: Session, user_id: int, tokens: List[str], min_id: int,
+               limit: int, offset: int) -> List[Tuple[int, float]]:
+        user_index = self._catch_up(db, user_id)
+        with self.lock:
+            ranked = user_index.search(tokens, min_id)
+        return ranked[offset:offset + limit]
+
+
+_backend = _InMemoryBackend()
+
+
+def init_chat_search(engine: Engine) -> str:
+    """Pilih & siapkan backend indeks sesuai dialect. Dipanggil dari lifespan."""
+    global _backend
+    dialect = engine.dialect.name
+    candidates = []
+    if dialect == "sqlite":
+        candidates.append(_SQLiteFTS5Backend())
+    elif dialect in ("mysql", "mariadb"):
+        candidates.append(_MySQLFulltextBackend())
+    candidates.append(_InMemoryBackend())
+
+    for backend in candidates:
+        try:
+            backend.setup(engine)
+            _backend = backend
+            break
+        except Exception as e:
+            print(f"⚠️ Indeks pencarian '{backend.name}' tidak tersedia: {e}")
+    return _backend.name
+
+
+def index_messages(db: Session, messages: Iterable) -> None:
+    """`messages`: objek/row dengan id, user_id, content, recipe_name, ingredients, steps."""
+    docs = [
+        (m.id, m.user_id, build_document(m.content, m.recipe_name, m.ingredients, m.steps))
+        for m in messages
+    ]
+    if docs:
+        _backend.index(db, docs)
+
+
+def remove_messages(db: Session, ids: List[int]) -> None:
+    if ids:
+        _backend.remove(db, ids)
+
+
+def search_messages(db: Session, user_id: int, query: str, limit: int = 20,
+                    offset: int = 0, min_id: int = 0) -> List[Tuple[int, float]]:
+    """Kembalikan [(message_id, score)] terurut dari yang paling relevan."""
+    tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return []
+    return _backend.search(db, user_id, tokens, min_id, limit, offset)
@@ -0,0 +1,154 @@
+# app/utils/groq_client.py
+"""
+Satu httpx.AsyncClient bersama untuk semua panggilan Groq.
+
+Dibuat di lifespan aplikasi (lihat main.py) dan ditutup saat shutdown,
+sehingga koneksi TCP/TLS (dan HTTP/2 kalau paket `h2` terpasang) dipakai ulang
+antar request, bukan membuka koneksi baru tiap chat/resep.
+"""
+import os
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401  (opsional, dibutuhkan httpx untuk HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 20))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", 10))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", 60))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", 5))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", 30))
+GROQ_WRITE_TIMEOUT = float(os.getenv("GROQ_WRITE_TIMEOUT", 10))
+GROQ_POOL_TIMEOUT = float(os.getenv("GROQ_POOL_TIMEOUT", GROQ_CONNECT_TIMEOUT))
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "1") == "1" and HTTP2_AVAILABLE
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+class GroqMetrics:
+    """
+    Pisahkan waktu koneksi (TCP + TLS, hanya saat koneksi baru) dari
+    latensi model (request terkirim -> header respons diterima).
+    Diisi dari event `trace` httpcore.
+    """
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.connect_ms = deque(maxlen=window)
+        self.model_ms = deque(maxlen=window)
+        self.total_ms = deque(maxlen=window)
+        self.first_token_ms = deque(maxlen=window)
+
+    def observe_first_token(self, seconds: float) -> None:
+        """Time-to-first-token untuk panggilan streaming."""
+        self.first_token_ms.append(seconds * 1000)
+
+    def tracer(self):
+        marks = {}
+
+        async def trace(event_name: str, info: dict):
+            marks[event_name] = time.perf_counter()
+
+        return trace, marks
+
+    def observe(self, marks: dict, total_seconds: float, ok: bool) -> None:
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms.append(total_seconds * 1000)
+
+        tcp_start = marks.get("connection.connect_tcp.started")
+        if tcp_start is not None:
+            connect_end = marks.get("connection.start_tls.complete") or marks.get("connection.connect_tcp.complete")
+            if connect_end is not None:
+                self.new_connections += 1
+                self.connect_ms.append((connect_end - tcp_start) * 1000)
+
+        for proto in ("http2", "http11"):
+            sent = marks.get(f"{proto}.send_request_headers.started")
+            received = marks.get(f"{proto}.receive_response_headers.complete")
+            if sent is not None and received is not None:
+                self.model_ms.append((received - sent) * 1000)
+                break
+
+    def snapshot(self) -> dict:
+        def summary(values):
+            return {
+                "count": len(values),
+                "p50_ms": _percentile(values, 50),
+                "p95_ms": _percentile(values, 95),
+                "p99_ms": _percentile(values, 99),
+            }
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "connection_reuse_ratio": (
+                1 - self.new_connections / self.requests if self.requests else None
+            ),
+            "http2": GROQ_HTTP2,
+            "connect": summary(self.connect_ms),
+            "model_latency": summary(self.model_ms),
+            "time_to_first_token": summary(self.first_token_ms),
+            "total": summary(self.total_ms),
+        }
+
+
+groq_metrics = GroqMetrics()
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=GROQ_HTTP2,
+        limits=httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=GROQ_CONNECT_TIMEOUT,
+            read=GROQ_READ_TIMEOUT,
+            write=GROQ_WRITE_TIMEOUT,
+            pool=GROQ_POOL_TIMEOUT,
+        ),
+    )
+
+
+async def start_groq_client() -> None:
+    global _client
+    if _client is None:
+        _client = _build_client()
+        print(f"✅ Groq client siap (HTTP/2: {'ya' if GROQ_HTTP2 else 'tidak'})")
+
+
+async def close_groq_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_groq_client() -> httpx.AsyncClient:
+    """Client bersama; dibuat lazy kalau lifespan belum jalan (mis. script/tes)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,205 @@
+# app/utils/groq_scheduler.py
+"""
+Admission control + antrian prioritas di depan Groq client.
+
+- Maksimal GROQ_MAX_CONCURRENCY request ke Groq sekaligus; sisanya antre.
+- Antrian berprioritas: generate resep didahulukan dari obrolan biasa.
+- Saat Groq membalas 429, dispatch ditahan sesuai `Retry-After`
+  (atau backoff eksponensial jika header tidak ada).
+- Jika perkiraan waktu tunggu melebihi deadline, request langsung ditolak
+  dengan 503 (lebih baik cepat gagal daripada menunggu lalu fallback).
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 8))
+GROQ_MAX_QUEUE_WAIT = float(os.getenv("GROQ_MAX_QUEUE_WAIT", 8))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 2))
+GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", 0.5))
+GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", 10))
+
+# Angka kecil = didahulukan
+PRIORITY_RECIPE = 0
+PRIORITY_CHAT = 1
+PRIORITY_BACKGROUND = 2
+
+
+class GroqOverloaded(HTTPException):
+    """503 dari scheduler sendiri (bukan dari Groq): diteruskan apa adanya ke client."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail="Layanan AI sedang sibuk, coba lagi sebentar lagi.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """`Retry-After` bisa berupa detik atau HTTP-date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqScheduler:
+    def __init__(self, max_concurrency: int = GROQ_MAX_CONCURRENCY, max_queue_wait: float = GROQ_MAX_QUEUE_WAIT):
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+        self._active = 0
+        self._queue = []  # heap: [priority, seq, future]
+        self._seq = itertools.count()
+        self._cooldown_until = 0.0  # time.monotonic()
+        self._timer = None
+        self._service_ewma = 1.0  # detik, perkiraan lama satu panggilan Groq
+
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.wait_ms = deque(maxlen=500)
+
+    # --- admission ---
+    def _queued_ahead(self, priority: int) -> int:
+        return sum(1 for p, _, fut in self._queue if p <= priority and not fut.done())
+
+    def estimate_wait(self, priority: int) -> float:
+        cooldown = max(0.0, self._cooldown_until - time.monotonic())
+        free = self.max_concurrency - self._active
+        ahead = self._queued_ahead(priority)
+        if free > ahead:
+            return cooldown
+        rounds = (ahead - free) // self.max_concurrency + 1
+        return cooldown + rounds * self._service_ewma
+
+    def check_admission(self, priority: int, deadline: Optional[float] = None) -> None:
+        """Tolak lebih awal (503) jika antrean diperkirakan melewati deadline."""
+        budget = (deadline - time.monotonic()) if deadline is not None else self.max_queue_wait
+        estimated = self.estimate_wait(priority)
+        if estimated > budget:
+            self.rejected += 1
+            raise GroqOverloaded(max(1, int(estimated - budget + 0.999)))
+
+    # --- dispatch ---
+    def _cooling(self) -> bool:
+        return time.monotonic() < self._cooldown_until
+
+    def _dispatch(self) -> None:
+        if self._cooling():
+            if self._timer is None:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(self._cooldown_until - time.monotonic(), self._on_timer)
+            return
+        while self._queue and self._active < self.max_concurrency:
+            _, _, fut = heapq.heappop(self._queue)
+            if fut.done():
+                continue
+            self._active += 1
+            fut.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    async def _acquire(self, priority: int, deadline: float) -> None:
+        self.check_admission(priority, deadline)
+        enqueued = time.monotonic()
+
+        if self._active < self.max_concurrency and not self._queue and not self._cooling():
+            self._active += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, [priority, next(self._seq), fut])
+            self._dispatch()
+            try:
+                await asyncio.wait_for(fut, timeout=max(0.0, deadline - time.monotonic()))
+            except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                if fut.done() and not fut.cancelled():
+                    # Slot sudah diberikan _dispatch sebelum waiter sempat lanjut
+                    self._return_slot()
+                else:
+                    fut.cancel()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.rejected += 1
+                    raise GroqOverloaded() from None
+                raise
+
+        self.admitted += 1
+        self.wait_ms.append((time.monotonic() - enqueued) * 1000)
+
+    def _return_slot(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _release(self, service_seconds: float) -> None:
+        self._service_ewma = 0.8 * self._service_ewma + 0.2 * service_seconds
+        self._return_slot()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_CHAT, deadline: Optional[float] = None):
+        """Tahan satu slot konkurensi selama blok berjalan (termasuk streaming)."""
+        if deadline is None:
+            deadline = time.monotonic() + self.max_queue_wait
+        await self._acquire(priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    # --- 429 ---
+    def note_rate_limited(self, retry_after: Optional[str], attempt: int) -> float:
+        """Tahan dispatch sampai Retry-After (atau backoff), kembalikan jedanya."""
+        self.rate_limited += 1
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = min(GROQ_BACKOFF_MAX, GROQ_BACKOFF_BASE * (2 ** attempt))
+            delay *= random.uniform(0.8, 1.2)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": sum(1 for _, _, fut in self._queue if not fut.done()),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "cooldown_remaining_s": max(0.0, self._cooldown_until - time.monotonic()),
+            "est_service_s": round(self._service_ewma, 3),
+            "wait": {
+                "p50_ms": _percentile(self.wait_ms, 50),
+                "p95_ms": _percentile(self.wait_ms, 95),
+                "p99_ms": _percentile(self.wait_ms, 99),
+            },
+        }
+
+
+groq_scheduler = GroqScheduler()
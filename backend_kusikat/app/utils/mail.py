@@ -1,15 +1,7 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
-
-MAILTRAP_USERNAME = os.getenv("MAILTRAP_USERNAME")
-MAILTRAP_PASSWORD = os.getenv("MAILTRAP_PASSWORD")
-MAILTRAP_HOST = os.getenv("MAILTRAP_HOST")
-MAILTRAP_PORT = os.getenv("MAILTRAP_PORT")
+from app.utils.mail_queue import mail_queue
 
 def send_otp_email(to_email: str, otp: str):
     subject = "Kusikat - OTP Reset Password"
@@ -31,11 +23,6 @@ def send_otp_email(to_email: str, otp: str):
     msg["Subject"] = subject
     msg.attach(MIMEText(body, "plain"))
 
-    try:
-        with smtplib.SMTP(MAILTRAP_HOST, MAILTRAP_PORT) as server:
-            server.starttls()
-            server.login(MAILTRAP_USERNAME, MAILTRAP_PASSWORD)
-            server.send_message(msg)
-            print(f"✅ OTP sent successfully to {to_email}")
-    except Exception as e:
-        print(f"❌ Failed to send OTP: {e}")
+    # SMTP (MAILTRAP_* / EMAIL_*) ditangani worker antrean email
+    if mail_queue.enqueue(msg):
+        print(f"✅ OTP queued for {to_email}")
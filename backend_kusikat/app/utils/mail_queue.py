@@ -0,0 +1,195 @@
+# app/utils/mail_queue.py
+"""
+Antrean email keluar dengan satu worker thread dan koneksi SMTP persisten.
+
+Sebelumnya setiap email membuka koneksi SMTP baru, STARTTLS, lalu login di
+dalam request (beberapa detik per email). Sekarang endpoint cukup
+`mail_queue.enqueue(msg)` lalu langsung membalas; worker:
+- memakai ulang satu koneksi yang sudah login selama masih hidup
+  (ditutup setelah MAIL_IDLE_TIMEOUT detik tanpa email),
+- reconnect otomatis jika server memutus koneksi,
+- retry dengan exponential backoff untuk error sementara (4xx / jaringan).
+  Error permanen (5xx, penerima ditolak) tidak di-retry.
+
+Konfigurasi SMTP dari EMAIL_* (fallback ke MAILTRAP_*).
+"""
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+from email.message import Message
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAIL_QUEUE_MAX = int(os.getenv("MAIL_QUEUE_MAX", 1000))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 3))
+MAIL_BACKOFF_BASE = float(os.getenv("MAIL_BACKOFF_BASE", 1.0))
+MAIL_BACKOFF_MAX = float(os.getenv("MAIL_BACKOFF_MAX", 30.0))
+MAIL_IDLE_TIMEOUT = float(os.getenv("MAIL_IDLE_TIMEOUT", 60.0))
+MAIL_SMTP_TIMEOUT = float(os.getenv("MAIL_SMTP_TIMEOUT", 15.0))
+
+
+class SmtpConfig:
+    def __init__(self, host: Optional[str], port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    @classmethod
+    def from_env(cls) -> "SmtpConfig":
+        def env(name: str) -> Optional[str]:
+            return os.getenv(f"EMAIL_{name}") or os.getenv(f"MAILTRAP_{name}")
+
+        return cls(
+            host=env("HOST"),
+            port=int(env("PORT") or 587),
+            username=env("USERNAME"),
+            password=env("PASSWORD"),
+            starttls=os.getenv("MAIL_STARTTLS", "1") == "1",
+        )
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+class MailQueue:
+    def __init__(self, config: Optional[SmtpConfig] = None, maxsize: int = MAIL_QUEUE_MAX,
+                 max_retries: int = MAIL_MAX_RETRIES, idle_timeout: float = MAIL_IDLE_TIMEOUT):
+        self.config = config or SmtpConfig.from_env()
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self._queue: "queue.Queue[Optional[Message]]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.connections = 0
+        self.last_error: Optional[str] = None
+
+    # --- API untuk endpoint ---
+    def enqueue(self, msg: Message) -> bool:
+        """Masukkan email ke antrean; False jika antrean penuh (email dibuang)."""
+        self.start()
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            self.dropped += 1
+            print(f"❌ Antrean email penuh, email ke {msg['To']} dibuang")
+            return False
+        self.enqueued += 1
+        return True
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Kirim sisa antrean (maks `timeout` detik) lalu hentikan worker."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout=timeout)
+
+    # --- Worker ---
+    def _connect(self) -> smtplib.SMTP:
+        cfg = self.config
+        if not cfg.host:
+            raise smtplib.SMTPException("EMAIL_HOST belum diset")
+        smtp = smtplib.SMTP(cfg.host, cfg.port, timeout=MAIL_SMTP_TIMEOUT)
+        try:
+            smtp.ehlo()
+            if cfg.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if cfg.username:
+                smtp.login(cfg.username, cfg.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self.connections += 1
+        return smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+    def _deliver(self, msg: Message) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._smtp is None:
+                    self._smtp = self._connect()
+                self._smtp.send_message(msg)
+                self.sent += 1
+                return
+            except (smtplib.SMTPException, OSError, socket.timeout) as e:
+                self.last_error = str(e)
+                # Balasan 4xx/5xx: smtplib sudah RSET, koneksi masih bisa dipakai.
+                # Selain itu (putus/timeout) buka koneksi baru di percobaan berikutnya.
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                    self._disconnect()
+                if _is_permanent(e) or attempt == self.max_retries:
+                    break
+                self.retries += 1
+                # Koneksi persisten diputus server (idle): langsung reconnect tanpa jeda
+                if not isinstance(e, smtplib.SMTPServerDisconnected):
+                    time.sleep(min(MAIL_BACKOFF_MAX, MAIL_BACKOFF_BASE * 2 ** attempt))
+        self.failed += 1
+        print(f"❌ Gagal kirim email ke {msg['To']}: {self.last_error}")
+
+    def _run(self) -> None:
+        while True:
+            try:
+                msg = self._queue.get(timeout=self.idle_timeout if self._smtp is not None else None)
+            except queue.Empty:
+                # Tidak ada email: lepas koneksi supaya tidak diputus server diam-diam
+                self._disconnect()
+                continue
+            if msg is None:
+                break
+            self._deliver(msg)
+        self._disconnect()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "connections": self.connections,
+            "connected": self._smtp is not None,
+            "last_error": self.last_error,
+        }
+
+
+mail_queue = MailQueue()
@@ -0,0 +1,120 @@
+# app/utils/offline_recipes.py
+"""
+Indeks resep lokal (offline) sebagai cadangan saat LLM lambat/gagal.
+
+Data dibaca lazy dari app/data/recipes.json (sekali, saat pencarian pertama)
+lalu diindeks di memori:
+- inverted index token bahan -> resep (bahan utama berbobot lebih tinggi)
+- status kesegaran -> resep yang cocok untuk status tersebut
+"""
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.recipe_cache import normalize_food_item, normalize_status
+
+load_dotenv()
+
+OFFLINE_RECIPES_PATH = os.getenv(
+    "OFFLINE_RECIPES_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "recipes.json")
+)
+
+MAIN_WEIGHT = 3.0
+INGREDIENT_WEIGHT = 1.0
+STATUS_WEIGHT = 2.0
+# Skor minimal agar resep lokal dianggap "cukup baik" tanpa menunggu LLM:
+# bahan utama cocok + status cocok
+GOOD_ENOUGH_SCORE = MAIN_WEIGHT + STATUS_WEIGHT
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+
+
+def _tokens(value: str) -> List[str]:
+    return _WORD_RE.findall(value.lower())
+
+
+class OfflineRecipeIndex:
+    def __init__(self, path: str = OFFLINE_RECIPES_PATH):
+        self.path = path
+        self._recipes: Optional[List[dict]] = None
+        self._main: Dict[str, Set[int]] = {}         # token bahan utama -> id resep
+        self._ingredients: Dict[str, Set[int]] = {}  # token daftar bahan -> id resep
+        self._statuses: Dict[str, Set[int]] = {}     # status -> id resep
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.served = Counter()
+
+    def _ensure_loaded(self) -> List[dict]:
+        if self._recipes is not None:
+            return self._recipes
+        with self._lock:
+            if self._recipes is None:
+                with open(self.path, encoding="utf-8") as f:
+                    recipes = json.load(f)
+                for recipe_id, recipe in enumerate(recipes):
+                    for item in recipe.get("main_ingredients", []):
+                        for token in _tokens(item):
+                            self._main.setdefault(token, set()).add(recipe_id)
+                    for line in recipe["ingredients"]:
+                        for token in _tokens(line):
+                            self._ingredients.setdefault(token, set()).add(recipe_id)
+                    for status in recipe.get("statuses", []):
+                        self._statuses.setdefault(normalize_status(status), set()).add(recipe_id)
+                self._recipes = recipes
+        return self._recipes
+
+    def search(self, food_item: str, freshness_status: str, limit: int = 3) -> List[Tuple[dict, float]]:
+        """[(resep, skor)] terurut; hanya resep yang memuat bahan yang diminta."""
+        recipes = self._ensure_loaded()
+        self.lookups += 1
+        scores: Dict[int, float] = {}
+        for token in _tokens(normalize_food_item(food_item)):
+            for recipe_id in self._main.get(token, ()):
+                scores[recipe_id] = scores.get(recipe_id, 0.0) + MAIN_WEIGHT
+            for recipe_id in self._ingredients.get(token, ()):
+                scores[recipe_id] = scores.get(recipe_id, 0.0) + INGREDIENT_WEIGHT
+
+        status_ids = self._statuses.get(normalize_status(freshness_status), set())
+        for recipe_id in scores:
+            if recipe_id in status_ids:
+                scores[recipe_id] += STATUS_WEIGHT
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(recipes[recipe_id], score) for recipe_id, score in ranked]
+
+    def best(self, food_item: str, freshness_status: str, min_score: float = INGREDIENT_WEIGHT) -> Optional[dict]:
+        """Resep terbaik dalam format RecipeResponse, atau None jika skornya kurang."""
+        try:
+            results = self.search(food_item, freshness_status, limit=1)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Indeks resep offline tidak bisa dimuat: {e}")
+            return None
+        if not results or results[0][1] < min_score:
+            return None
+        recipe = results[0][0]
+        return {
+            "recipe_name": recipe["recipe_name"],
+            "ingredients": list(recipe["ingredients"]),
+            "steps": list(recipe["steps"]),
+        }
+
+    def record(self, reason: str) -> None:
+        self.served[reason] += 1
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._recipes is not None,
+            "recipes": len(self._recipes) if self._recipes is not None else None,
+            "lookups": self.lookups,
+            "served": dict(self.served),
+        }
+
+
+offline_recipes = OfflineRecipeIndex()
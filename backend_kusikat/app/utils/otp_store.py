@@ -0,0 +1,212 @@
+# app/utils/otp_store.py
+"""
+Penyimpanan OTP WhatsApp yang bisa diganti backend-nya (OTP_STORE):
+
+- "memory" (default): dict + min-heap waktu kadaluarsa. Entri kadaluarsa
+  dibuang setiap kali store disentuh (cukup cek puncak heap), jadi memori
+  tidak tumbuh walau OTP tidak pernah diverifikasi. Hanya untuk 1 worker.
+- "sql": tabel `otp_codes` (index di expires_at) supaya OTP yang dikirim
+  worker A bisa diverifikasi worker B.
+
+Keduanya membandingkan OTP secara constant-time dan menghitung percobaan;
+setelah OTP_MAX_ATTEMPTS kali salah, OTP hangus dan user harus minta ulang.
+"""
+import heapq
+import hmac
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.models import OtpCode
+
+load_dotenv()
+
+OTP_STORE = os.getenv("OTP_STORE", "memory").lower()
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))
+# Jeda minimal antar sweep tabel otp_codes (per proses)
+OTP_SWEEP_INTERVAL = float(os.getenv("OTP_SWEEP_INTERVAL", 60))
+
+
+def otp_matches(expected: str, given: str) -> bool:
+    return hmac.compare_digest(expected.encode(), (given or "").encode())
+
+
+class _Entry:
+    __slots__ = ("otp", "expires_at", "attempts")
+
+    def __init__(self, otp: str, expires_at: float):
+        self.otp = otp
+        self.expires_at = expires_at
+        self.attempts = 0
+
+
+class MemoryOtpStore:
+    backend = "memory"
+
+    def __init__(self, max_attempts: int = OTP_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._entries: Dict[str, _Entry] = {}
+        self._heap: List[Tuple[float, str]] = []  # (expires_at, key); bisa berisi entri basi
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.verified = 0
+        self.failed = 0
+        self.locked_out = 0
+        self.expired = 0
+
+    def _sweep(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            # OTP yang sudah diganti punya expires_at lain; biarkan
+            if entry is not None and entry.expires_at == expires_at:
+                del self._entries[key]
+                self.expired += 1
+
+    def put(self, key: str, otp: str, ttl: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            entry = _Entry(otp, now + ttl)
+            self._entries[key] = entry
+            heapq.heappush(self._heap, (entry.expires_at, key))
+            self.issued += 1
+
+    def verify(self, key: str, otp: str) -> bool:
+        with self._lock:
+            self._sweep(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.failed += 1
+                return False
+            entry.attempts += 1
+            if not otp_matches(entry.otp, otp):
+                self.failed += 1
+                if entry.attempts >= self.max_attempts:
+                    del self._entries[key]
+                    self.locked_out += 1
+                return False
+            del self._entries[key]
+            self.verified += 1
+            return True
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "active": len(self._entries),
+            "heap": len(self._heap),
+            "issued": self.issued,
+            "verified": self.verified,
+            "failed": self.failed,
+            "locked_out": self.locked_out,
+            "expired": self.expired,
+        }
+
+
+class SqlOtpStore:
+    backend = "sql"
+
+    def __init__(self, max_attempts: int = OTP_MAX_ATTEMPTS, sweep_interval: float = OTP_SWEEP_INTERVAL):
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self.issued = 0
+        self.verified = 0
+        self.failed = 0
+        self.locked_out = 0
+        self.expired = 0
+
+    def _sweep(self, db, now: datetime) -> None:
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = time.monotonic()
+        self.expired += db.query(OtpCode).filter(OtpCode.expires_at <= now).delete(synchronize_session=False)
+
+    def put(self, key: str, otp: str, ttl: float) -> None:
+        now = datetime.utcnow()
+        values = {OtpCode.otp: otp, OtpCode.expires_at: now + timedelta(seconds=ttl), OtpCode.attempts: 0}
+        db = SessionLocal()
+        try:
+            self._sweep(db, now)
+            if not db.query(OtpCode).filter(OtpCode.phone_number == key).update(values, synchronize_session=False):
+                try:
+                    db.add(OtpCode(phone_number=key, otp=otp, expires_at=values[OtpCode.expires_at], attempts=0))
+                    db.flush()
+                except IntegrityError:
+                    # Worker lain baru saja insert nomor yang sama
+                    db.rollback()
+                    db.query(OtpCode).filter(OtpCode.phone_number == key).update(values, synchronize_session=False)
+            db.commit()
+            self.issued += 1
+        finally:
+            db.close()
+
+    def verify(self, key: str, otp: str) -> bool:
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            # Hitung percobaan secara atomik di database (aman antar worker)
+            counted = db.query(OtpCode).filter(
+                OtpCode.phone_number == key,
+                OtpCode.expires_at > now,
+                OtpCode.attempts < self.max_attempts,
+            ).update({OtpCode.attempts: OtpCode.attempts + 1}, synchronize_session=False)
+            if not counted:
+                # Tidak ada, kadaluarsa, atau sudah melewati batas percobaan
+                db.query(OtpCode).filter(
+                    OtpCode.phone_number == key,
+                    or_(OtpCode.expires_at <= now, OtpCode.attempts >= self.max_attempts),
+                ).delete(synchronize_session=False)
+                db.commit()
+                self.failed += 1
+                return False
+
+            row = db.query(OtpCode.otp, OtpCode.attempts).filter(OtpCode.phone_number == key).first()
+            if row is None or not otp_matches(row.otp, otp):
+                if row is not None and row.attempts >= self.max_attempts:
+                    db.query(OtpCode).filter(OtpCode.phone_number == key).delete(synchronize_session=False)
+                    self.locked_out += 1
+                db.commit()
+                self.failed += 1
+                return False
+
+            # Sekali pakai: hanya satu worker yang berhasil menghapus baris ini
+            consumed = db.query(OtpCode).filter(
+                OtpCode.phone_number == key, OtpCode.otp == row.otp
+            ).delete(synchronize_session=False)
+            db.commit()
+            if consumed:
+                self.verified += 1
+            else:
+                self.failed += 1
+            return bool(consumed)
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "issued": self.issued,
+            "verified": self.verified,
+            "failed": self.failed,
+            "locked_out": self.locked_out,
+            "expired": self.expired,
+        }
+
+
+def create_otp_store(backend: str = OTP_STORE):
+    if backend == "sql":
+        return SqlOtpStore()
+    if backend != "memory":
+        print(f"⚠️ OTP_STORE '{backend}' tidak dikenal, pakai memory")
+    return MemoryOtpStore()
+
+
+otp_store = create_otp_store()
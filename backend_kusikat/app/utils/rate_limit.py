@@ -0,0 +1,198 @@
+# app/utils/rate_limit.py
+"""
+Rate limit token bucket untuk endpoint mahal (kirim WA, sesi SMTP, hash pbkdf2).
+
+Dipasang sebagai dependency route: `Depends(rate_limit("login"))`. Dependency
+hanya membaca IP klien dan satu field identitas (nomor HP / email / username)
+dari query atau body JSON yang sudah di-parse, jadi 429 dikirim sebelum ada
+query DB atau panggilan jaringan.
+
+- Bucket di memori, dibagi ke beberapa shard dengan lock masing-masing
+  (tidak ada satu lock global yang diperebutkan semua request).
+- Refill lazy: token dihitung ulang saat bucket disentuh, tanpa timer.
+- Bucket yang lama tidak dipakai dibuang LRU per shard (RATE_LIMIT_MAX_KEYS).
+- Backend bisa diganti (mis. Redis untuk multi-worker) lewat
+  `rate_limiter.backend = ...`: objek apa pun dengan
+  `take(key, limit) -> (diizinkan, detik sampai token berikutnya)` dan
+  `stats() -> dict`, seperti ShardedMemoryBackend.
+
+Policy per route, format "<jumlah>/<detik>" (0 = nonaktif), bisa di-override
+lewat env RATE_LIMIT_<POLICY>_<DIMENSI>, mis. RATE_LIMIT_LOGIN_IP=30/60.
+"""
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 16))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 50000))
+# Pakai X-Forwarded-For hanya jika backend di belakang reverse proxy tepercaya
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+# policy -> dimensi -> "jumlah/detik". Dimensi "ip" = alamat klien,
+# selain itu nama field di query/body JSON.
+DEFAULT_POLICIES: Dict[str, Dict[str, str]] = {
+    "request_otp": {"ip": "10/600", "phone_number": "3/600"},
+    "forgot_password": {"ip": "10/600", "email": "3/600"},
+    "login": {"ip": "30/60", "username": "10/300"},
+}
+
+
+class RateLimited(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail="Terlalu banyak permintaan, coba lagi nanti.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+class Limit:
+    """Bucket berkapasitas `burst` token, terisi penuh kembali dalam `period` detik."""
+    __slots__ = ("burst", "period", "rate")
+
+    def __init__(self, burst: int, period: float):
+        self.burst = burst
+        self.period = period
+        self.rate = burst / period  # token per detik
+
+    @classmethod
+    def parse(cls, spec: str) -> Optional["Limit"]:
+        count, _, seconds = spec.strip().partition("/")
+        if not count or int(count) <= 0:
+            return None
+        return cls(int(count), float(seconds or 1))
+
+    def __repr__(self):
+        return f"{self.burst}/{self.period:g}"
+
+
+class ShardedMemoryBackend:
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        # key -> [token, waktu refill terakhir]
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self.evicted = 0
+
+    def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        """Ambil 1 token dari bucket `key`: (diizinkan, detik sampai token berikutnya tersedia)."""
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [float(limit.burst), now]
+                if len(buckets) > self.max_keys_per_shard:
+                    buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0.0
+            return False, (1 - bucket[0]) / limit.rate
+
+    def stats(self) -> dict:
+        return {
+            "shards": len(self._shards),
+            "buckets": sum(len(buckets) for _, buckets in self._shards),
+            "evicted": self.evicted,
+        }
+
+
+def load_policies(defaults: Dict[str, Dict[str, str]] = DEFAULT_POLICIES) -> Dict[str, List[Tuple[str, Limit]]]:
+    policies = {}
+    for name, dimensions in defaults.items():
+        rules = []
+        for dimension, spec in dimensions.items():
+            env_key = f"RATE_LIMIT_{name}_{dimension}".upper()
+            limit = Limit.parse(os.getenv(env_key, spec))
+            if limit is not None:
+                rules.append((dimension, limit))
+        policies[name] = rules
+    return policies
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    def __init__(self, backend=None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.backend = backend or ShardedMemoryBackend()
+        self.enabled = enabled
+        self.policies = load_policies()
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    async def _identity(self, request: Request, field: str) -> Optional[str]:
+        value = request.query_params.get(field)
+        if value is None and request.headers.get("content-type", "").startswith("application/json"):
+            try:
+                # Body sudah dibaca FastAPI sebelum dependency jalan; ini dari cache
+                body = await request.json()
+            except ValueError:
+                body = None
+            if isinstance(body, dict):
+                value = body.get(field)
+        if value is None:
+            return None
+        value = str(value).strip().lower()
+        if field == "phone_number":
+            # 0812.. / +62812.. / 62812.. dihitung sebagai nomor yang sama
+            value = re.sub(r"\D", "", value)
+            if value.startswith("0"):
+                value = "62" + value[1:]
+        return value or None
+
+    async def check(self, policy: str, request: Request) -> None:
+        if not self.enabled:
+            return
+        for dimension, limit in self.policies.get(policy, ()):
+            if dimension == "ip":
+                value = client_ip(request)
+            else:
+                value = await self._identity(request, dimension)
+                if value is None:
+                    continue
+            ok, retry_after = self.backend.take(f"{policy}:{dimension}:{value}", limit)
+            if not ok:
+                self.rejected[f"{policy}:{dimension}"] += 1
+                raise RateLimited(retry_after)
+        self.allowed[policy] += 1
+
+    def dependency(self, policy: str):
+        if policy not in self.policies:
+            raise ValueError(f"Policy rate limit tidak dikenal: {policy}")
+
+        async def enforce(request: Request) -> None:
+            await self.check(policy, request)
+
+        return enforce
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "policies": {name: {d: repr(l) for d, l in rules} for name, rules in self.policies.items()},
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "backend": self.backend.stats(),
+        }
+
+
+rate_limiter = RateLimiter()
+rate_limit = rate_limiter.dependency
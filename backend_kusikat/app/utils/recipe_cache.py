@@ -0,0 +1,129 @@
+# app/utils/recipe_cache.py
+"""
+Cache LRU + TTL untuk hasil generate resep.
+
+Kunci = (bahan ternormalisasi, status kesegaran, sensor yang dibulatkan ke bucket),
+karena kombinasi ini berulang terus antar user. Tiap kunci menyimpan beberapa
+varian resep: selama varian belum penuh, request tetap ke LLM (dan hasilnya
+ditambahkan); setelah penuh, salah satu varian dipilih acak.
+"""
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RECIPE_CACHE_MAX_KEYS = int(os.getenv("RECIPE_CACHE_MAX_KEYS", 1024))
+RECIPE_CACHE_TTL = float(os.getenv("RECIPE_CACHE_TTL", 6 * 3600))
+RECIPE_CACHE_VARIANTS = int(os.getenv("RECIPE_CACHE_VARIANTS", 3))
+
+# Lebar bucket sensor
+TEMP_BUCKET = float(os.getenv("RECIPE_CACHE_TEMP_BUCKET", 2))        # °C
+HUMIDITY_BUCKET = float(os.getenv("RECIPE_CACHE_HUMIDITY_BUCKET", 10))  # %
+VOC_BUCKET = float(os.getenv("RECIPE_CACHE_VOC_BUCKET", 25))
+DAYS_BUCKET = float(os.getenv("RECIPE_CACHE_DAYS_BUCKET", 1))
+
+
+def _bucket(value: Optional[float], width: float) -> Optional[float]:
+    if value is None:
+        return None
+    return round(value / width) * width
+
+
+def normalize_food_item(food_item: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (food_item or "").strip().lower())
+
+
+def normalize_status(status: Optional[str]) -> str:
+    return re.sub(r"[\s_]+", "_", (status or "").strip().lower())
+
+
+def make_recipe_key(food_item, freshness_status, temperature=None, humidity=None,
+                    voc=None, estimated_days_left=None) -> Tuple:
+    return (
+        normalize_food_item(food_item),
+        normalize_status(freshness_status),
+        _bucket(temperature, TEMP_BUCKET),
+        _bucket(humidity, HUMIDITY_BUCKET),
+        _bucket(voc, VOC_BUCKET),
+        _bucket(estimated_days_left, DAYS_BUCKET),
+    )
+
+
+class _Entry:
+    __slots__ = ("expires_at", "variants", "generated")
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        self.variants = []
+        # Jumlah hasil LLM yang masuk, termasuk yang kebetulan identik;
+        # tanpa ini kunci dengan jawaban yang selalu sama tidak pernah "penuh".
+        self.generated = 0
+
+
+class RecipeCache:
+    def __init__(self, max_keys: int = RECIPE_CACHE_MAX_KEYS, ttl: float = RECIPE_CACHE_TTL,
+                 variants: int = RECIPE_CACHE_VARIANTS):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.variants = variants
+        self._entries = OrderedDict()  # key -> _Entry
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key) -> Optional[dict]:
+        """Varian acak jika kunci sudah punya cukup varian, selain itu None (miss)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+
+        if entry is None or entry.generated < self.variants:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return random.choice(entry.variants)
+
+    def put(self, key, recipe: dict) -> None:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry(time.monotonic() + self.ttl)
+            self._entries[key] = entry
+        entry.generated += 1
+        if recipe not in entry.variants:
+            entry.variants.append(recipe)
+            del entry.variants[:-self.variants]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "keys": len(self._entries),
+            "max_keys": self.max_keys,
+            "variants_per_key": self.variants,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+recipe_cache = RecipeCache()
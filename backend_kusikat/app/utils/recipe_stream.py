@@ -0,0 +1,92 @@
+# app/utils/recipe_stream.py
+"""
+Parser JSON inkremental untuk output resep yang di-stream dari LLM.
+
+Potongan teks dimasukkan lewat `feed()` begitu tiba; setiap string yang
+sudah lengkap secara sintaks di path yang kita kenal langsung dikeluarkan:
+    recipe_name        -> ("recipe_name", "...")
+    ingredients[i]     -> ("ingredient", "...")
+    steps[i]           -> ("step", "...")
+Teks sebelum `{` pertama (mis. "Berikut resepnya:") dan setelah objek
+utama ditutup diabaikan. Validasi akhir tetap lewat RecipeResponse.
+"""
+import json
+from typing import List, Tuple
+
+_ITEM_EVENTS = {"ingredients": "ingredient", "steps": "step"}
+
+
+class _Frame:
+    __slots__ = ("is_object", "key", "expecting_key")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key = None
+        self.expecting_key = is_object
+
+
+class IncrementalRecipeParser:
+    def __init__(self):
+        self.stack: List[_Frame] = []
+        self.started = False
+        self.done = False
+        self._string = None   # list karakter mentah (termasuk kutip) saat di dalam string
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        events = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._string is not None:
+                self._string.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    raw = "".join(self._string)
+                    self._string = None
+                    try:
+                        value = json.loads(raw)
+                    except json.JSONDecodeError:
+                        value = raw[1:-1]
+                    self._on_string(value, events)
+                continue
+
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append(_Frame(True))
+                continue
+
+            if ch == '"':
+                self._string = [ch]
+            elif ch == "{" or ch == "[":
+                self.stack.append(_Frame(ch == "{"))
+            elif ch == "}" or ch == "]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.done = True
+            elif ch == ",":
+                top = self.stack[-1]
+                if top.is_object:
+                    top.expecting_key = True
+            # ':' , spasi, angka, true/false/null tidak perlu diproses
+        return events
+
+    def _on_string(self, value: str, events: List[Tuple[str, str]]) -> None:
+        top = self.stack[-1]
+        if top.is_object and top.expecting_key:
+            top.key = value
+            top.expecting_key = False
+            return
+
+        depth = len(self.stack)
+        if depth == 1 and top.key == "recipe_name":
+            events.append(("recipe_name", value))
+        elif depth == 2 and not top.is_object:
+            parent_key = self.stack[0].key
+            if parent_key in _ITEM_EVENTS:
+                events.append((_ITEM_EVENTS[parent_key], value))
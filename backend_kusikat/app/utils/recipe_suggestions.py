@@ -0,0 +1,122 @@
+# app/utils/recipe_suggestions.py
+"""
+Cache saran resep per wadah (container), diisi proaktif saat status kesegaran
+berubah menjadi `mulai_layu` / `hampir_busuk` (lihat create_sensor_data).
+
+User biasanya membuka halaman makanan tepat setelah notifikasi WhatsApp;
+resep untuk status saat itu sudah siap sehingga /ai/generate-recipe tidak
+perlu menunggu LLM. Saran hanya dipakai jika statusnya sama dengan status
+yang diminta, dan diganti setiap kali status berubah atau user meminta ulang.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.recipe_cache import normalize_food_item, normalize_status
+
+load_dotenv()
+
+RECIPE_SUGGESTION_TTL = float(os.getenv("RECIPE_SUGGESTION_TTL", 12 * 3600))
+# Isi wadah (dipisah koma). Sensor saat ini hanya memantau satu wadah bayam.
+CONTAINER_ITEMS = [i.strip() for i in os.getenv("CONTAINER_ITEMS", "Bayam").split(",") if i.strip()]
+# Semua data sensor masuk ke user default (id=1), jadi wadahnya juga satu
+DEFAULT_CONTAINER_ID = 1
+PRECOMPUTE_STATUSES = {"mulai_layu", "hampir_busuk"}
+
+
+class _Suggestion:
+    __slots__ = ("status", "recipe", "expires_at")
+
+    def __init__(self, status: str, recipe: dict, expires_at: float):
+        self.status = status
+        self.recipe = recipe
+        self.expires_at = expires_at
+
+
+class RecipeSuggestionCache:
+    def __init__(self, ttl: float = RECIPE_SUGGESTION_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[int, str], _Suggestion] = {}
+        self._pending = set()  # container_id yang sedang diprecompute
+        self._dirty: Dict[int, Callable[[], Awaitable[int]]] = {}  # job terbaru yang datang saat pending
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+        self.precomputed = 0
+        self.precompute_errors = 0
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Event loop aplikasi; dipanggil dari lifespan."""
+        self._loop = loop
+
+    def get(self, container_id: int, food_item: str, status: str) -> Optional[dict]:
+        entry = self._entries.get((container_id, normalize_food_item(food_item)))
+        if entry is None or entry.status != normalize_status(status) or entry.expires_at < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.recipe
+
+    def put(self, container_id: int, food_item: str, status: str, recipe: dict) -> None:
+        self._entries[(container_id, normalize_food_item(food_item))] = _Suggestion(
+            normalize_status(status), recipe, time.monotonic() + self.ttl
+        )
+
+    def submit(self, container_id: int, job: Callable[[], Awaitable[int]]) -> bool:
+        """
+        Jalankan `job` (coroutine yang mengembalikan jumlah resep tersimpan) di
+        event loop aplikasi. Aman dipanggil dari thread endpoint sync.
+        Jika wadah sedang diprecompute, job terbaru disimpan dan dijalankan
+        setelah job sekarang selesai (job lama yang menunggu digantikan).
+        """
+        if self._loop is None or self._loop.is_closed():
+            return False
+        with self._lock:
+            if container_id in self._pending:
+                self._dirty[container_id] = job
+                return True
+            self._pending.add(container_id)
+
+        async def run():
+            next_job = job
+            try:
+                while next_job is not None:
+                    try:
+                        self.precomputed += await next_job()
+                    except Exception as e:
+                        self.precompute_errors += 1
+                        print("Gagal precompute resep:", str(e))
+                    with self._lock:
+                        next_job = self._dirty.pop(container_id, None)
+                        if next_job is None:
+                            self._pending.discard(container_id)
+            finally:
+                if next_job is not None:
+                    # Dibatalkan (mis. shutdown): jangan biarkan wadah terkunci
+                    with self._lock:
+                        self._dirty.pop(container_id, None)
+                        self._pending.discard(container_id)
+
+        asyncio.run_coroutine_threadsafe(run(), self._loop)
+        return True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "containers_pending": len(self._pending),
+            "containers_dirty": len(self._dirty),
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "precomputed": self.precomputed,
+            "precompute_errors": self.precompute_errors,
+        }
+
+
+recipe_suggestions = RecipeSuggestionCache()
@@ -0,0 +1,111 @@
+# app/utils/reset_token_sweeper.py
+"""
+Pembersih periodik tabel `password_reset_tokens`.
+
+Token hanya dihapus saat verifikasi berhasil; OTP yang tidak pernah dipakai
+(atau salah ketik lalu minta ulang) tertinggal selamanya. Task ini berjalan
+di event loop aplikasi (start/stop di lifespan) dan setiap
+RESET_TOKEN_SWEEP_INTERVAL detik menghapus token kadaluarsa per batch kecil
+(satu commit per batch) lewat index `expires_at`, supaya tidak ada DELETE
+besar yang menahan lock di MySQL.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models import PasswordResetToken
+
+load_dotenv()
+
+RESET_TOKEN_SWEEP_INTERVAL = float(os.getenv("RESET_TOKEN_SWEEP_INTERVAL", 600))
+RESET_TOKEN_SWEEP_BATCH = int(os.getenv("RESET_TOKEN_SWEEP_BATCH", 500))
+RESET_TOKEN_SWEEP_PAUSE = float(os.getenv("RESET_TOKEN_SWEEP_PAUSE", 0.05))
+
+
+class ResetTokenSweeper:
+    def __init__(self, interval: float = RESET_TOKEN_SWEEP_INTERVAL, batch_size: int = RESET_TOKEN_SWEEP_BATCH,
+                 pause: float = RESET_TOKEN_SWEEP_PAUSE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.deleted = 0
+        self.errors = 0
+        self.last_run_at: Optional[float] = None
+
+    def sweep_once(self) -> int:
+        """Hapus semua token kadaluarsa (blocking, per batch). Mengembalikan jumlah baris."""
+        now = datetime.utcnow()
+        total = 0
+        db = SessionLocal()
+        try:
+            while True:
+                ids = [
+                    row.id for row in db.query(PasswordResetToken.id)
+                    .filter(PasswordResetToken.expires_at < now)
+                    .limit(self.batch_size)
+                    .all()
+                ]
+                if not ids:
+                    break
+                db.query(PasswordResetToken).filter(
+                    PasswordResetToken.id.in_(ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+                total += len(ids)
+                if len(ids) < self.batch_size:
+                    break
+                time.sleep(self.pause)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            self.runs += 1
+            self.deleted += total
+            self.last_run_at = time.time()
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await run_in_threadpool(self.sweep_once)
+                if deleted:
+                    print(f"🧹 {deleted} token reset password kadaluarsa dihapus.")
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Gagal membersihkan token reset password: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at,
+        }
+
+
+reset_token_sweeper = ResetTokenSweeper()
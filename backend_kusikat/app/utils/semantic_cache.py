@@ -0,0 +1,200 @@
+# app/utils/semantic_cache.py
+"""
+Cache jawaban semantik (lokal) untuk /ai/chat.
+
+Pertanyaan dinormalisasi (huruf kecil, kata gaul -> baku, stopword dibuang),
+lalu di-embed dengan hashing vectorizer: n-gram karakter (3-4) per kata +
+unigram kata, di-hash ke SEMANTIC_CACHE_DIM dimensi dan dinormalisasi L2.
+Semua vektor ada di satu matriks NumPy; lookup = satu perkalian matriks-vektor
+(cosine) + argmax, tanpa jaringan/GPU.
+
+Pertanyaan yang bergantung waktu ("hari ini", "sekarang", harga, cuaca, ...)
+atau yang merujuk percakapan sebelumnya ("yang tadi", "tersebut") tidak di-cache.
+Nama user di jawaban diganti placeholder agar jawaban bisa dipakai user lain.
+
+NumPy opsional: jika tidak terpasang, cache nonaktif (selalu miss).
+"""
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Optional
+
+from dotenv import load_dotenv
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+load_dotenv()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1" and NUMPY_AVAILABLE
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", 2048))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.8))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 24 * 3600))
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", 1024))
+
+NAME_PLACEHOLDER = "\x00nama\x00"
+
+# Bentuk gaul/sinonim umum -> bentuk baku, supaya varian pertanyaan bertemu
+_SYNONYMS = {
+    "gimana": "bagaimana", "bgmn": "bagaimana", "gmn": "bagaimana", "caranya": "cara",
+    "biar": "agar", "supaya": "agar", "spy": "agar",
+    "gak": "tidak", "nggak": "tidak", "ngga": "tidak", "ga": "tidak", "enggak": "tidak", "tdk": "tidak",
+    "yg": "yang", "dgn": "dengan", "sm": "sama", "utk": "untuk", "buat": "untuk",
+    "awet": "tahan_lama", "simpan": "menyimpan", "nyimpen": "menyimpan", "nyimpan": "menyimpan",
+    "disimpan": "menyimpan", "masak": "memasak", "bikin": "membuat", "buatnya": "membuat",
+    "bisa": "dapat", "kalo": "kalau", "klo": "kalau", "aja": "saja",
+}
+_PHRASES = [
+    (re.compile(r"\btahan\s+lama\b"), "tahan_lama"),
+    (re.compile(r"\btidak\s+cepat\s+(busuk|layu)\b"), "tahan_lama"),
+]
+_STOPWORDS = {
+    "dan", "di", "ke", "dari", "yang", "untuk", "agar", "dengan", "ini", "saya", "aku", "kak",
+    "dong", "sih", "ya", "deh", "nih", "tolong", "mohon", "bagaimana", "apa", "cara", "saja",
+    "junbot", "bot", "halo", "hai", "min", "kah", "nya", "the", "a",
+}
+_TIME_SENSITIVE = re.compile(
+    r"\b(hari\s+ini|sekarang|saat\s+ini|besok|kemarin|lusa|minggu\s+ini|bulan\s+ini|tahun\s+ini|"
+    r"jam\s+berapa|pukul|tanggal|cuaca|berita|terbaru|terkini|harga|promo)\b"
+)
+_FOLLOW_UP = re.compile(r"\b(tadi|yang\s+itu|tersebut|barusan|sebelumnya|lanjutkan)\b")
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+MIN_CONTENT_WORDS = 2
+
+
+def normalize_question(text: str) -> list:
+    lowered = text.lower()
+    words = [_SYNONYMS.get(w, w) for w in _WORD_RE.findall(lowered)]
+    joined = " ".join(words)
+    for pattern, replacement in _PHRASES:
+        joined = pattern.sub(replacement, joined)
+    return [w for w in joined.split() if w not in _STOPWORDS]
+
+
+def is_cacheable(text: str) -> bool:
+    lowered = text.lower()
+    if _TIME_SENSITIVE.search(lowered) or _FOLLOW_UP.search(lowered):
+        return False
+    return len(normalize_question(text)) >= MIN_CONTENT_WORDS
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+class SemanticCache:
+    def __init__(self, capacity: int = SEMANTIC_CACHE_CAPACITY, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: float = SEMANTIC_CACHE_TTL, dim: int = SEMANTIC_CACHE_DIM,
+                 enabled: bool = SEMANTIC_CACHE_ENABLED):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dim = dim
+        self.enabled = enabled and NUMPY_AVAILABLE
+        if self.enabled:
+            self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+            self._valid = np.zeros(capacity, dtype=bool)
+        self._slots = OrderedDict()  # slot -> (jawaban, expires_at), urutan LRU
+        self._free = list(range(capacity - 1, -1, -1))
+        self._high = 0  # batas atas slot yang pernah dipakai
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.lookup_us = deque(maxlen=500)
+
+    def embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in normalize_question(text):
+            vector[zlib.crc32(word.encode()) % self.dim] += 2.0
+            padded = f"<{word}>"
+            for n in (3, 4):
+                for i in range(len(padded) - n + 1):
+                    vector[zlib.crc32(padded[i:i + n].encode()) % self.dim] += 1.0
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def get(self, question: str, user_name: str = "") -> Optional[str]:
+        if not self.enabled:
+            return None
+        if not is_cacheable(question):
+            self.skipped += 1
+            return None
+        started = time.perf_counter()
+        vector = self.embed(question)
+        answer = None
+        if vector is not None and self._slots:
+            # Slot diisi dari bawah, jadi cukup hitung sampai slot tertinggi
+            scores = self._matrix[:self._high] @ vector
+            scores[~self._valid[:self._high]] = -1.0
+            slot = int(np.argmax(scores))
+            if scores[slot] >= self.threshold:
+                answer, expires_at = self._slots[slot]
+                if expires_at < time.monotonic():
+                    self._drop(slot)
+                    answer = None
+                else:
+                    self._slots.move_to_end(slot)
+        self.lookup_us.append((time.perf_counter() - started) * 1e6)
+
+        if answer is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return answer.replace(NAME_PLACEHOLDER, user_name or "Pengguna")
+
+    def put(self, question: str, answer: str, user_name: str = "") -> None:
+        if not self.enabled or not is_cacheable(question):
+            return
+        vector = self.embed(question)
+        if vector is None:
+            return
+        if user_name and user_name != "Pengguna":
+            answer = re.sub(rf"\b{re.escape(user_name)}\b", NAME_PLACEHOLDER, answer)
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot, _ = self._slots.popitem(last=False)
+            self.evictions += 1
+        self._high = max(self._high, slot + 1)
+        self._matrix[slot] = vector
+        self._valid[slot] = True
+        self._slots[slot] = (answer, time.monotonic() + self.ttl)
+
+    def _drop(self, slot: int) -> None:
+        del self._slots[slot]
+        self._valid[slot] = False
+        self._free.append(slot)
+
+    def clear(self) -> None:
+        for slot in list(self._slots):
+            self._drop(slot)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "lookup_p50_us": _percentile(self.lookup_us, 50),
+            "lookup_p99_us": _percentile(self.lookup_us, 99),
+        }
+
+
+semantic_cache = SemanticCache()
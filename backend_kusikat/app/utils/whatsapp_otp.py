@@ -1,11 +1,16 @@
 import requests
 import random
-import time
+import os
+from dotenv import load_dotenv
 
-WA_API_URL = "https://api.aliffajriadi.my.id/botwa/api/kirim-pesan"
-WA_API_KEY = "apikeyrivaldokelompokpbliot02334"
+from app.utils.otp_store import otp_store
+
+load_dotenv()
+
+# Bisa diarahkan ke gateway lokal (bench/mock_wa_gateway.py) lewat .env
+WA_API_URL = os.getenv("WA_API_URL", "https://api.aliffajriadi.my.id/botwa/api/kirim-pesan")
+WA_API_KEY = os.getenv("WA_API_KEY", "apikeyrivaldokelompokpbliot02334")
 
-otp_storage = {}
 OTP_EXPIRE_SECONDS = 300
 
 
@@ -38,11 +43,8 @@ def send_otp_whatsapp(phone_number: str) -> bool:
         response = requests.post(WA_API_URL, json=payload, headers=headers, timeout=10)
 
         if response.status_code == 200:
-            otp_storage[phone_number] = {
-                "otp": otp,
-                "expired_at": time.time() + OTP_EXPIRE_SECONDS
-            }
-            print("OTP DISIMPAN:", phone_number, otp)
+            otp_store.put(phone_number, otp, OTP_EXPIRE_SECONDS)
+            print("OTP DISIMPAN:", phone_number)
             return True
 
     except Exception as e:
@@ -53,19 +55,6 @@ def send_otp_whatsapp(phone_number: str) -> bool:
 
 def verify_otp(phone_number: str, otp: str) -> bool:
     phone_number = normalize_phone(phone_number)
-    data = otp_storage.get(phone_number)
-
-    print("VERIFY OTP:", phone_number, otp, data)
-
-    if not data:
-        return False
-
-    if time.time() > data["expired_at"]:
-        del otp_storage[phone_number]
-        return False
-
-    if data["otp"] != otp:
-        return False
-
-    del otp_storage[phone_number]
-    return True
+    ok = otp_store.verify(phone_number, otp)
+    print("VERIFY OTP:", phone_number, "OK" if ok else "GAGAL")
+    return ok
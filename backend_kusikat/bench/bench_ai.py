@@ -0,0 +1,206 @@
+# bench/bench_ai.py
+"""
+Benchmark route AI (`/api/ai/chat`, `/api/ai/chat/stream`, `/api/ai/generate-recipe`)
+terhadap mock Groq lokal, tanpa kredit API dan tanpa jaringan.
+
+Per route dilaporkan: throughput, persentil latensi, time-to-first-token
+(route streaming, diukur di klien), tingkat fallback (jawaban cadangan /
+resep offline) dan jumlah 503 dari admission control.
+
+Contoh:
+    python -m bench.bench_ai --requests 200 --concurrency 20 --latency 0.5 --rate-429 0.05
+    python -m bench.bench_ai --routes chat_stream --tokens-per-second 50 --no-cache
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from bench.server_utils import ServerThread, free_port, prepare_env, summarize
+
+ROUTES = ("chat", "chat_stream", "recipe")
+CHAT_FALLBACK = "Maaf, saya sedang tidak bisa merespons. Coba lagi nanti."
+RECIPE_FALLBACK = "⚠️ Gagal Generate Resep"
+
+VEGETABLES = ["bayam", "kangkung", "sawi", "wortel", "kol", "tomat", "buncis", "terong", "brokoli", "tauge"]
+TOPICS = ["cara menyimpan", "kandungan gizi", "cara memilih", "olahan untuk anak", "cara membersihkan"]
+STATUSES = ["Segar", "Mulai Layu", "Hampir Busuk"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark route AI terhadap mock Groq")
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"dipisah koma: {', '.join(ROUTES)}")
+    parser.add_argument("--requests", type=int, default=100, help="jumlah request per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=250)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--groq-concurrency", type=int, default=None, help="GROQ_MAX_CONCURRENCY backend")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="matikan cache semantik & cache resep supaya setiap request ke mock Groq")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def chat_payload(i: int) -> dict:
+    return {"message": f"{random.choice(TOPICS)} {random.choice(VEGETABLES)} (pertanyaan {i})"}
+
+
+def recipe_payload(i: int) -> dict:
+    return {
+        "food_item": random.choice(VEGETABLES).title(),
+        "freshness_status": random.choice(STATUSES),
+        "temperature": round(random.uniform(2, 30), 1),
+        "humidity": round(random.uniform(40, 95), 1),
+        "voc": round(random.uniform(0, 350), 1),
+    }
+
+
+class RouteResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.ttft = []
+        self.fallbacks = 0
+        self.rejected = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+
+async def _one(client: httpx.AsyncClient, route: str, i: int, result: RouteResult) -> None:
+    t0 = time.perf_counter()
+    if route == "chat_stream":
+        async with client.stream("POST", "/api/ai/chat/stream", json=chat_payload(i)) as res:
+            if res.status_code == 503:
+                result.rejected += 1
+                return
+            event, first_token = None, True
+            async for line in res.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    # Token dikirim tanpa nama event; `done`/`error` punya event sendiri
+                    if event is None and first_token:
+                        result.ttft.append(time.perf_counter() - t0)
+                        first_token = False
+                    elif event == "error":
+                        result.fallbacks += 1
+                    event = None
+        result.latencies.append(time.perf_counter() - t0)
+        return
+
+    path = "/api/ai/chat" if route == "chat" else "/api/ai/generate-recipe"
+    payload = chat_payload(i) if route == "chat" else recipe_payload(i)
+    res = await client.post(path, json=payload)
+    result.latencies.append(time.perf_counter() - t0)
+    if res.status_code == 503:
+        result.rejected += 1
+    elif res.status_code != 200:
+        result.failed += 1
+    else:
+        body = res.json()
+        if body.get("reply") == CHAT_FALLBACK or body.get("recipe_name") == RECIPE_FALLBACK:
+            result.fallbacks += 1
+
+
+async def run_route(base_url: str, route: str, requests: int, concurrency: int) -> RouteResult:
+    result = RouteResult(route)
+    counter = iter(range(requests))
+
+    async def worker(client):
+        for i in counter:
+            try:
+                await _one(client, route, i, result)
+            except httpx.HTTPError:
+                result.failed += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def report(result: RouteResult, requests: int, offline_served: int) -> None:
+    print(f"=== {result.name} ===")
+    print(summarize("latensi", result.latencies))
+    if result.ttft:
+        print(summarize("time-to-first-token", result.ttft))
+    print(f"throughput: {requests / result.elapsed:.1f} req/s (wall {result.elapsed:.2f}s)")
+    fallback = result.fallbacks + offline_served
+    print(
+        f"fallback: {fallback}/{requests} ({fallback / requests:.1%})"
+        + (f" [resep offline={offline_served}]" if result.name == "recipe" else "")
+        + f" | 503={result.rejected} | gagal={result.failed}"
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        raise SystemExit(f"Route tidak dikenal: {', '.join(sorted(unknown))}")
+
+    from bench.mock_groq import GroqMockConfig, create_app as create_mock
+
+    mock_port = free_port()
+    env = {
+        "GROQ_API_URL": f"http://127.0.0.1:{mock_port}/openai/v1/chat/completions",
+        "GROQ_API_KEY": "bench-key",
+    }
+    if args.groq_concurrency:
+        env["GROQ_MAX_CONCURRENCY"] = args.groq_concurrency
+    if args.no_cache:
+        env["SEMANTIC_CACHE_ENABLED"] = "0"
+        env["RECIPE_CACHE_VARIANTS"] = 10 ** 9
+    prepare_env(**env)
+
+    # Import setelah env siap
+    from app.main import app
+
+    mock_app = create_mock(GroqMockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        hang_rate=args.hang_rate,
+    ))
+
+    with ServerThread(mock_app, port=mock_port) as mock, ServerThread(app) as backend:
+        for route in routes:
+            httpx.post(f"{mock.url}/reset")
+            offline_before = httpx.get(f"{backend.url}/api/ai/metrics").json()["offline_recipes"]["served"]
+            result = asyncio.run(run_route(backend.url, route, args.requests, args.concurrency))
+            metrics = httpx.get(f"{backend.url}/api/ai/metrics").json()
+            offline_after = metrics["offline_recipes"]["served"]
+            offline_served = sum(offline_after.values()) - sum(offline_before.values())
+            report(result, args.requests, offline_served)
+            mock_stats = httpx.get(f"{mock.url}/stats").json()
+            print(
+                f"mock groq: diterima={mock_stats['received']} selesai={mock_stats['completed']} "
+                f"429={mock_stats['throttled']} error={mock_stats['errors']} "
+                f"maks paralel={mock_stats['max_in_flight']}"
+            )
+
+        print("=== Metrik backend (/api/ai/metrics) ===")
+        print(json.dumps({
+            "groq": metrics["groq"],
+            "scheduler": metrics["scheduler"],
+        }, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+# bench/bench_login.py
+"""
+Benchmark throughput `POST /api/login` terhadap jumlah worker hasher password.
+
+Untuk setiap nilai --workers, pool `password_hasher` dibuat ulang dengan jumlah
+proses tersebut lalu dikirim burst login paralel. Selama burst, `GET
+/api/sensors/latest` (endpoint sync) di-probe terus untuk memastikan hashing
+tidak lagi menahan threadpool request lain.
+
+Contoh:
+    python -m bench.bench_login --workers 1,2,4 --requests 400 --concurrency 32
+    python -m bench.bench_login --rounds 100000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from bench.server_utils import ServerThread, prepare_env, summarize
+
+USERNAME = "bench_login"
+PASSWORD = "bench-password-123"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark login vs jumlah worker hasher")
+    parser.add_argument("--workers", default=None,
+                        help="daftar jumlah proses hasher, dipisah koma (default: 1,2,4,.. s/d jumlah core)")
+    parser.add_argument("--requests", type=int, default=200, help="jumlah login per putaran")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=None, help="PASSWORD_HASH_ROUNDS backend")
+    return parser.parse_args(argv)
+
+
+def default_workers() -> list:
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+async def burst(base_url: str, requests: int, concurrency: int):
+    latencies, probe, failed = [], [], 0
+    counter = iter(range(requests))
+    done = asyncio.Event()
+
+    async def worker(client):
+        nonlocal failed
+        for _ in counter:
+            t0 = time.perf_counter()
+            res = await client.post("/api/login", json={"username": USERNAME, "password": PASSWORD})
+            latencies.append(time.perf_counter() - t0)
+            if res.status_code != 200:
+                failed += 1
+
+    async def prober(client):
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await client.get("/api/sensors/latest")
+            probe.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        probe_task = asyncio.create_task(prober(client))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    return latencies, probe, failed, elapsed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_workers()
+    # Burst login dari satu IP/username memang yang diukur; matikan rate limit
+    env = {"RATE_LIMIT_ENABLED": "0"}
+    if args.rounds:
+        env["PASSWORD_HASH_ROUNDS"] = args.rounds
+    prepare_env(**env)
+
+    # Import setelah env siap
+    from app.main import app
+    from app.auth.passwords import password_hasher
+
+    results = []
+    with ServerThread(app) as backend:
+        res = httpx.post(f"{backend.url}/api/register", json={
+            "username": USERNAME,
+            "email": "bench-login@example.com",
+            "password": PASSWORD,
+            "phone_number": "081234567890",
+        }, timeout=60.0)
+        res.raise_for_status()
+
+        for workers in counts:
+            # Pool baru per putaran; pemanasan supaya waktu spawn proses tidak ikut terukur
+            password_hasher.close()
+            password_hasher.workers = workers
+            password_hasher.max_pending = max(password_hasher.max_pending, args.concurrency)
+            asyncio.run(burst(backend.url, workers, workers))
+
+            latencies, probe, failed, elapsed = asyncio.run(burst(backend.url, args.requests, args.concurrency))
+            throughput = args.requests / elapsed
+            results.append((workers, throughput))
+            print(f"=== {workers} worker hasher ===")
+            print(summarize("latensi login", latencies))
+            print(summarize("latensi /api/sensors/latest selama burst", probe))
+            print(f"throughput: {throughput:.1f} login/s | gagal={failed}")
+
+    base = results[0][1]
+    print("=== Skala ===")
+    for workers, throughput in results:
+        print(f"{workers:>3} worker: {throughput:7.1f} login/s ({throughput / base:.2f}x)")
+    print(f"(core tersedia: {os.cpu_count()}, rounds: {password_hasher.rounds})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
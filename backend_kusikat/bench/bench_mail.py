@@ -0,0 +1,124 @@
+# bench/bench_mail.py
+"""
+Benchmark `POST /api/forgot-password` + antrean email terhadap SMTP lokal (aiosmtpd).
+
+Mengukur:
+- latensi endpoint (harus tetap kecil walau SMTP lambat, karena hanya enqueue)
+- throughput pengiriman email oleh worker antrean
+- jumlah koneksi SMTP yang dibuka (koneksi persisten: idealnya 1) dan retry
+
+Butuh aiosmtpd: pip install -r bench/requirements.txt
+
+Contoh:
+    python -m bench.bench_mail --requests 200 --concurrency 20 --smtp-latency 0.05 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench.server_utils import ServerThread, free_port, percentile, prepare_env, summarize
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark forgot-password + antrean email")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--smtp-latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    return parser.parse_args(argv)
+
+
+async def run_requests(base_url: str, emails: list, requests: int, concurrency: int):
+    latencies, failed = [], 0
+    counter = iter(range(requests))
+
+    async def worker(client):
+        nonlocal failed
+        for i in counter:
+            t0 = time.perf_counter()
+            res = await client.post("/api/forgot-password", json={"email": emails[i % len(emails)]})
+            latencies.append(time.perf_counter() - t0)
+            if res.status_code != 200:
+                failed += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, failed, elapsed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from bench.mock_smtp import SmtpMock, SmtpMockConfig
+
+    smtp_port = free_port()
+    prepare_env(
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=smtp_port,
+        EMAIL_USERNAME="",
+        MAIL_STARTTLS="0",
+        MAIL_BACKOFF_BASE="0.05",
+        # Satu email menerima banyak OTP memang bagian dari beban uji
+        RATE_LIMIT_ENABLED="0",
+    )
+
+    # Import setelah env siap
+    from app.main import app
+    from app.database import SessionLocal
+    from app.models import User
+
+    emails = [f"bench-mail-{i}@example.com" for i in range(args.users)]
+    config = SmtpMockConfig(latency=args.smtp_latency, error_rate=args.error_rate)
+
+    with SmtpMock(smtp_port, config) as smtp, ServerThread(app) as backend:
+        db = SessionLocal()
+        try:
+            db.add_all([User(username=f"bench_mail_{i}", email=email) for i, email in enumerate(emails)])
+            db.commit()
+        finally:
+            db.close()
+
+        latencies, failed, elapsed = asyncio.run(
+            run_requests(backend.url, emails, args.requests, args.concurrency)
+        )
+
+        deadline = time.time() + args.drain_timeout
+        while time.time() < deadline:
+            queue_stats = httpx.get(f"{backend.url}/api/auth/metrics").json()["mail_queue"]
+            if queue_stats["sent"] + queue_stats["failed"] + queue_stats["dropped"] >= args.requests:
+                break
+            time.sleep(0.1)
+        stats = smtp.stats.snapshot()
+
+    print("=== Endpoint /api/forgot-password ===")
+    print(summarize("latensi", latencies))
+    print(f"throughput: {args.requests / elapsed:.1f} req/s | gagal={failed}")
+    print("=== Antrean email ===")
+    print(
+        f"terkirim={queue_stats['sent']} gagal={queue_stats['failed']} dibuang={queue_stats['dropped']} "
+        f"retry={queue_stats['retries']} koneksi SMTP={queue_stats['connections']}"
+    )
+    first, last = stats["first_received_at"], stats["last_received_at"]
+    if first is not None and last is not None and last > first:
+        print(f"throughput email: {(stats['received'] - 1) / (last - first):.1f} email/s")
+    print(f"SMTP mock: diterima={stats['received']} ditolak(451)={stats['rejected']} koneksi={stats['connections']}")
+
+    # p50, bukan max: ekor latensi di SQLite didominasi lock tulis, bukan SMTP
+    p50 = percentile(latencies, 50)
+    blocked = p50 >= args.smtp_latency > 0
+    print(
+        f"endpoint p50 {p50 * 1000:.1f}ms vs latensi SMTP {args.smtp_latency * 1000:.0f}ms -> "
+        + ("❌ endpoint menunggu SMTP" if blocked else "✅ endpoint tidak menunggu SMTP")
+    )
+    return 1 if blocked else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+# bench/bench_notifications.py
+"""
+Benchmark ingest sensor + notifikasi WhatsApp terhadap gateway lokal.
+
+Mengirim urutan VOC yang selalu mengubah status (segar -> mulai_layu ->
+hampir_busuk -> busuk -> segar ...) ke `POST /api/sensors/`, lalu mengukur:
+- latensi ingest end-to-end (dari sisi klien HTTP)
+- throughput notifikasi yang diterima gateway mock
+
+Contoh:
+    python -m bench.bench_notifications --requests 200 --gateway-latency 1.0 --rate-429 0.1
+"""
+import argparse
+import threading
+import time
+
+import httpx
+
+from bench.server_utils import ServerThread, free_port, prepare_env, summarize
+
+# Satu nilai VOC per status, urutan ini selalu memicu transisi
+VOC_CYCLE = [10.0, 100.0, 200.0, 500.0]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingest sensor + notifikasi WA")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--gateway-latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from bench.mock_wa_gateway import GatewayConfig, create_app as create_gateway
+
+    gateway_port = free_port()
+    prepare_env(WA_API_URL=f"http://127.0.0.1:{gateway_port}/botwa/api/kirim-pesan")
+
+    # Import setelah env siap
+    from app.main import app
+    from app.database import SessionLocal
+    from app.models import Notification
+
+    gateway_app = create_gateway(GatewayConfig(
+        latency=args.gateway_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+    ))
+
+    # Notifikasi di-dedup per judul per hari; kosongkan tabel terus-menerus
+    # supaya setiap transisi benar-benar memanggil gateway.
+    stop_reset = threading.Event()
+
+    def reset_dedup():
+        while not stop_reset.is_set():
+            db = SessionLocal()
+            try:
+                db.query(Notification).delete()
+                db.commit()
+            finally:
+                db.close()
+            stop_reset.wait(0.02)
+
+    resetter = threading.Thread(target=reset_dedup, daemon=True)
+
+    with ServerThread(gateway_app, port=gateway_port) as gateway, ServerThread(app) as backend:
+        resetter.start()
+        latencies = []
+        started = time.perf_counter()
+        with httpx.Client(base_url=backend.url, timeout=30.0) as client:
+            for i in range(args.requests):
+                payload = {"temperature": 4.0, "humidity": 85.0, "voc": VOC_CYCLE[i % len(VOC_CYCLE)]}
+                t0 = time.perf_counter()
+                res = client.post("/api/sensors/", json=payload)
+                latencies.append(time.perf_counter() - t0)
+                res.raise_for_status()
+        ingest_elapsed = time.perf_counter() - started
+
+        # Transisi pertama (tanpa data sebelumnya) tidak mengirim notifikasi.
+        # Berhenti juga kalau hitungan gateway sudah stabil.
+        expected = args.requests - 1
+        quiet_period = max(2.0, 3 * args.gateway_latency)
+        deadline = time.time() + args.drain_timeout
+        stats, last_count, last_change = {}, -1, time.time()
+        while time.time() < deadline:
+            stats = httpx.get(f"{gateway.url}/stats").json()
+            if stats["received"] >= expected:
+                break
+            if stats["received"] != last_count:
+                last_count, last_change = stats["received"], time.time()
+            elif time.time() - last_change > quiet_period:
+                break
+            time.sleep(0.1)
+        stop_reset.set()
+        resetter.join()
+
+    print("=== Ingest sensor ===")
+    print(summarize("latensi ingest", latencies))
+    print(f"throughput ingest: {args.requests / ingest_elapsed:.1f} req/s")
+    print("=== Gateway WA ===")
+    print(
+        f"diterima={stats.get('received')} terkirim={stats.get('delivered')} "
+        f"error={stats.get('errors')} 429={stats.get('throttled')}"
+    )
+    first, last = stats.get("first_delivered_at"), stats.get("last_delivered_at")
+    if first is not None and last is not None and last > first:
+        print(f"throughput notifikasi: {(stats['delivered'] - 1) / (last - first):.1f} pesan/s")
+
+    worst = max(latencies) if latencies else 0.0
+    blocked = worst >= args.gateway_latency
+    print(
+        f"ingest max {worst * 1000:.1f}ms vs latensi gateway {args.gateway_latency * 1000:.0f}ms -> "
+        + ("❌ ingest TERTAHAN oleh pengiriman WA" if blocked else "✅ pengiriman WA tidak menahan ingest")
+    )
+    return 1 if blocked else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
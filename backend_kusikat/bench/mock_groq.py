@@ -0,0 +1,215 @@
+# bench/mock_groq.py
+"""
+Stand-in lokal untuk `api.groq.com/openai/v1/chat/completions` (format OpenAI).
+
+- latensi sampai token pertama + kecepatan token (tokens/s) yang bisa diatur
+- mode streaming (`"stream": true`, SSE `data: {...}` ... `data: [DONE]`)
+- injeksi error: 500, 429 (+ Retry-After) dan request yang menggantung
+
+Prompt resep (memuat "recipe_name") dibalas JSON resep, selain itu teks chat.
+
+Jalankan:
+    python -m bench.mock_groq --port 8082 --latency 0.4 --tokens-per-second 200 --rate-429 0.05
+
+Lalu arahkan backend ke sini lewat .env:
+    GROQ_API_URL=http://127.0.0.1:8082/openai/v1/chat/completions
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import List
+
+from fastapi import FastAPI, Body, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CHAT_REPLY = (
+    "Halo! Agar bayam tetap segar lebih lama, jangan dicuci sebelum disimpan. "
+    "Bungkus dengan tisu dapur kering lalu masukkan ke wadah tertutup di laci sayur kulkas. "
+    "Bayam sebaiknya dimasak dalam dua sampai tiga hari dan jangan dipanaskan ulang berkali-kali."
+)
+RECIPE_REPLY = json.dumps({
+    "recipe_name": "Tumis Bayam Jagung",
+    "ingredients": ["1 ikat bayam", "1 buah jagung manis, pipil", "3 siung bawang putih", "1 sdm saus tiram", "Garam secukupnya"],
+    "steps": ["Tumis bawang putih hingga harum.", "Masukkan jagung, masak 2 menit.", "Masukkan bayam dan saus tiram.", "Bumbui garam, aduk rata, lalu sajikan."],
+}, ensure_ascii=False)
+
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+
+@dataclass
+class GroqMockConfig:
+    latency: float = 0.3            # detik sampai token pertama
+    jitter: float = 0.05            # detik, +/- acak
+    tokens_per_second: float = 250  # kecepatan generate setelah token pertama
+    error_rate: float = 0.0         # peluang balas 500
+    rate_429: float = 0.0           # peluang balas 429
+    retry_after: float = 1          # nilai header Retry-After saat 429
+    hang_rate: float = 0.0          # peluang request menggantung `hang_seconds`
+    hang_seconds: float = 60.0
+    api_key: str | None = None      # None = terima key apa pun
+
+
+class GroqMockStats:
+    def __init__(self):
+        self.received = 0
+        self.completed = 0
+        self.streamed = 0
+        self.errors = 0
+        self.throttled = 0
+        self.hung = 0
+        self.unauthorized = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def snapshot(self) -> dict:
+        return dict(self.__dict__)
+
+
+def split_tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+def create_app(config: GroqMockConfig) -> FastAPI:
+    app = FastAPI(title="Mock Groq")
+    app.state.config = config
+    app.state.stats = GroqMockStats()
+    # RNG sendiri: tidak terpengaruh seed milik skrip benchmark di proses yang sama
+    rng = random.Random()
+
+    def reply_for(payload: dict) -> str:
+        messages = payload.get("messages") or [{}]
+        prompt = messages[-1].get("content") or ""
+        return RECIPE_REPLY if "recipe_name" in prompt else CHAT_REPLY
+
+    def chunk(model: str, content: str | None, finish: str | None = None) -> str:
+        body = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": finish}],
+        }
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    @app.post("/openai/v1/chat/completions")
+    async def completions(payload: dict = Body(...), authorization: str | None = Header(None)):
+        cfg: GroqMockConfig = app.state.config
+        stats: GroqMockStats = app.state.stats
+        stats.received += 1
+
+        if cfg.api_key is not None and authorization != f"Bearer {cfg.api_key}":
+            stats.unauthorized += 1
+            return JSONResponse(status_code=401, content={"error": {"message": "Invalid API Key"}})
+
+        roll = rng.random()
+        if roll < cfg.rate_429:
+            stats.throttled += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "tokens"}},
+                headers={"Retry-After": str(cfg.retry_after)}
+            )
+        if roll < cfg.rate_429 + cfg.error_rate:
+            stats.errors += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "Internal server error"}})
+
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            if rng.random() < cfg.hang_rate:
+                stats.hung += 1
+                await asyncio.sleep(cfg.hang_seconds)
+            await asyncio.sleep(max(0.0, cfg.latency + rng.uniform(-cfg.jitter, cfg.jitter)))
+        except asyncio.CancelledError:
+            stats.in_flight -= 1
+            raise
+
+        model = payload.get("model", "mock")
+        tokens = split_tokens(reply_for(payload))
+        per_token = 1 / cfg.tokens_per_second if cfg.tokens_per_second > 0 else 0.0
+
+        if payload.get("stream"):
+            stats.streamed += 1
+
+            async def generate():
+                try:
+                    for token in tokens:
+                        yield chunk(model, token)
+                        await asyncio.sleep(per_token)
+                    yield chunk(model, None, finish="stop")
+                    yield "data: [DONE]\n\n"
+                    stats.completed += 1
+                finally:
+                    stats.in_flight -= 1
+
+            return StreamingResponse(generate(), media_type="text/event-stream")
+
+        try:
+            await asyncio.sleep(per_token * len(tokens))
+        finally:
+            stats.in_flight -= 1
+        stats.completed += 1
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"completion_tokens": len(tokens)},
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        return app.state.stats.snapshot()
+
+    @app.post("/reset")
+    def reset_stats():
+        app.state.stats = GroqMockStats()
+        return {"message": "Statistik direset"}
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Groq (OpenAI-compatible) untuk testing lokal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=250)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--api-key", default=None)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args) -> GroqMockConfig:
+    return GroqMockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        api_key=args.api_key,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,121 @@
+# bench/mock_smtp.py
+"""
+Server SMTP lokal (aiosmtpd) sebagai pengganti Mailtrap/Gmail untuk testing.
+
+- latensi per email dan peluang balasan 451 (error sementara) yang bisa diatur
+- menghitung koneksi, email diterima, dan email ditolak
+
+aiosmtpd hanya dipakai untuk testing/benchmark (bench/requirements.txt):
+    pip install -r bench/requirements.txt
+
+Jalankan:
+    python -m bench.mock_smtp --port 8025 --latency 0.2 --error-rate 0.05
+
+Lalu arahkan backend ke sini lewat .env:
+    EMAIL_HOST=127.0.0.1
+    EMAIL_PORT=8025
+    MAIL_STARTTLS=0
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+try:
+    from aiosmtpd.controller import Controller
+    AIOSMTPD_AVAILABLE = True
+except ImportError:
+    Controller = None
+    AIOSMTPD_AVAILABLE = False
+
+
+@dataclass
+class SmtpMockConfig:
+    latency: float = 0.0     # detik per email (setelah DATA)
+    error_rate: float = 0.0  # peluang balas 451 (backend harus retry)
+
+
+class SmtpMockStats:
+    def __init__(self):
+        self.connections = 0
+        self.received = 0
+        self.rejected = 0
+        self.first_received_at = None
+        self.last_received_at = None
+
+    def snapshot(self) -> dict:
+        return dict(self.__dict__)
+
+
+class CountingHandler:
+    def __init__(self, config: SmtpMockConfig):
+        self.config = config
+        self.stats = SmtpMockStats()
+        self.messages = []
+        # RNG sendiri: tidak terpengaruh seed milik skrip benchmark di proses yang sama
+        self.rng = random.Random()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # Dipanggil sekali per koneksi baru (dan lagi setelah STARTTLS)
+        if not getattr(session, "counted", False):
+            session.counted = True
+            self.stats.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        if self.rng.random() < self.config.error_rate:
+            self.stats.rejected += 1
+            return "451 Requested action aborted: local error in processing"
+        now = time.time()
+        self.stats.received += 1
+        if self.stats.first_received_at is None:
+            self.stats.first_received_at = now
+        self.stats.last_received_at = now
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos), envelope.content))
+        return "250 OK"
+
+
+class SmtpMock:
+    """`with SmtpMock(port, config) as smtp:` -> server SMTP berjalan di thread aiosmtpd."""
+
+    def __init__(self, port: int, config: SmtpMockConfig = None, host: str = "127.0.0.1"):
+        if not AIOSMTPD_AVAILABLE:
+            raise RuntimeError("aiosmtpd belum terpasang: pip install -r bench/requirements.txt")
+        self.handler = CountingHandler(config or SmtpMockConfig())
+        self.controller = Controller(self.handler, hostname=host, port=port)
+
+    @property
+    def stats(self) -> SmtpMockStats:
+        return self.handler.stats
+
+    def __enter__(self):
+        self.controller.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.controller.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Server SMTP lokal untuk testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with SmtpMock(args.port, SmtpMockConfig(args.latency, args.error_rate), host=args.host) as smtp:
+        print(f"SMTP mock di {args.host}:{args.port} (Ctrl+C untuk berhenti)")
+        try:
+            while True:
+                time.sleep(5)
+                print(smtp.stats.snapshot())
+        except KeyboardInterrupt:
+            pass
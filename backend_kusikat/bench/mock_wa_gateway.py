@@ -0,0 +1,137 @@
+# bench/mock_wa_gateway.py
+"""
+Stand-in lokal untuk API bot WhatsApp (`/botwa/api/kirim-pesan`).
+
+Jalankan:
+    python -m bench.mock_wa_gateway --port 8081 --latency 0.5 --error-rate 0.1 --rate-429 0.05
+
+Lalu arahkan backend ke sini lewat .env:
+    WA_API_URL=http://127.0.0.1:8081/botwa/api/kirim-pesan
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from fastapi import FastAPI, Header, Body
+from fastapi.responses import JSONResponse
+
+DEFAULT_API_KEY = "apikeyrivaldokelompokpbliot02334"
+
+
+@dataclass
+class GatewayConfig:
+    latency: float = 0.2          # detik, rata-rata
+    jitter: float = 0.05          # detik, +/- acak
+    error_rate: float = 0.0       # peluang balas 500
+    rate_429: float = 0.0         # peluang balas 429
+    retry_after: int = 1          # nilai header Retry-After saat 429
+    api_key: str = DEFAULT_API_KEY
+
+
+@dataclass
+class GatewayStats:
+    received: int = 0
+    delivered: int = 0
+    errors: int = 0
+    throttled: int = 0
+    unauthorized: int = 0
+    delivered_at: List[float] = field(default_factory=list)
+
+    def snapshot(self) -> dict:
+        first = self.delivered_at[0] if self.delivered_at else None
+        last = self.delivered_at[-1] if self.delivered_at else None
+        return {
+            "received": self.received,
+            "delivered": self.delivered,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "unauthorized": self.unauthorized,
+            "first_delivered_at": first,
+            "last_delivered_at": last,
+        }
+
+
+def create_app(config: GatewayConfig) -> FastAPI:
+    app = FastAPI(title="Mock WA Gateway")
+    app.state.config = config
+    app.state.stats = GatewayStats()
+    app.state.messages = []
+
+    @app.post("/botwa/api/kirim-pesan")
+    async def kirim_pesan(
+        payload: dict = Body(...),
+        x_api_key: str | None = Header(None)
+    ):
+        cfg: GatewayConfig = app.state.config
+        stats: GatewayStats = app.state.stats
+        stats.received += 1
+
+        if x_api_key != cfg.api_key:
+            stats.unauthorized += 1
+            return JSONResponse(status_code=401, content={"status": False, "message": "API key salah"})
+
+        delay = max(0.0, cfg.latency + random.uniform(-cfg.jitter, cfg.jitter))
+        await asyncio.sleep(delay)
+
+        roll = random.random()
+        if roll < cfg.rate_429:
+            stats.throttled += 1
+            return JSONResponse(
+                status_code=429,
+                content={"status": False, "message": "Terlalu banyak permintaan"},
+                headers={"Retry-After": str(cfg.retry_after)}
+            )
+        if roll < cfg.rate_429 + cfg.error_rate:
+            stats.errors += 1
+            return JSONResponse(status_code=500, content={"status": False, "message": "Gateway error"})
+
+        stats.delivered += 1
+        stats.delivered_at.append(time.perf_counter())
+        app.state.messages.append({"nomor": payload.get("nomor"), "pesan": payload.get("pesan")})
+        return {"status": True, "message": "Pesan terkirim"}
+
+    @app.get("/stats")
+    def get_stats():
+        return app.state.stats.snapshot()
+
+    @app.post("/reset")
+    def reset_stats():
+        app.state.stats = GatewayStats()
+        app.state.messages = []
+        return {"message": "Statistik direset"}
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mock gateway WhatsApp untuk testing lokal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--api-key", default=DEFAULT_API_KEY)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args) -> GatewayConfig:
+    return GatewayConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        api_key=args.api_key,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,81 @@
+# bench/server_utils.py
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import uvicorn
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prepare_env(**overrides) -> str:
+    """
+    Set env minimal supaya `app.main` bisa di-import tanpa .env produksi.
+    Harus dipanggil SEBELUM import apa pun dari `app`.
+    Mengembalikan path database SQLite sementara.
+    """
+    db_path = os.path.join(tempfile.mkdtemp(prefix="kusikat-bench-"), "bench.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    for key, value in overrides.items():
+        os.environ[key] = str(value)
+    return db_path
+
+
+class ServerThread:
+    """Jalankan aplikasi ASGI dengan uvicorn di thread terpisah."""
+
+    def __init__(self, app, port: int | None = None, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port or free_port()
+        config = uvicorn.Config(app, host=host, port=self.port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 15
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"Server di port {self.port} tidak start")
+            time.sleep(0.02)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(label: str, seconds) -> str:
+    ms = [s * 1000 for s in seconds]
+    if not ms:
+        return f"{label}: tidak ada sampel"
+    return (
+        f"{label}: n={len(ms)} "
+        f"mean={statistics.mean(ms):.1f}ms "
+        f"p50={percentile(ms, 50):.1f}ms "
+        f"p95={percentile(ms, 95):.1f}ms "
+        f"p99={percentile(ms, 99):.1f}ms "
+        f"max={max(ms):.1f}ms"
+    )
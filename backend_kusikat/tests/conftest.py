@@ -0,0 +1,32 @@
+# tests/conftest.py
+"""
+Lingkungan test: SQLite di folder sementara (bukan MySQL dari .env) dan
+SECRET_KEY tetap, di-set sebelum modul `app` di-import.
+
+Jalankan dari backend_kusikat/:
+    pip install -r bench/requirements.txt
+    python -m pytest -q
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="kusikat-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401  (daftarkan semua tabel ke Base.metadata)
+
+
+@pytest.fixture
+def db():
+    """Session ke database kosong; semua tabel dibuat ulang per test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
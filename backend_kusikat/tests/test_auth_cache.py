@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.auth.auth_cache import AuthCache, UserSnapshot, auth_cache
+from app.auth.google_auth import _find_or_create_user
+from app.auth.jwt_handler import create_access_token
+from app.models import User
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="budi", email="budi@example.com")
+    db.add(user)
+    db.commit()
+    # Database dibuat ulang per test, id bisa sama dengan snapshot test sebelumnya
+    auth_cache.invalidate_user(user.id)
+    return user
+
+
+@pytest.fixture
+def client(user):
+    token = create_access_token({"sub": user.email, "id": user.id})
+    client = TestClient(main.app)
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_snapshot_is_read_only():
+    snapshot = UserSnapshot(id=1, username="budi")
+    with pytest.raises(AttributeError):
+        snapshot.username = "ani"
+
+
+def test_user_snapshot_is_cached_until_invalidated():
+    cache = AuthCache(user_ttl=60)
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return User(id=user_id, username=f"user{len(loads)}", email="x@example.com")
+
+    assert cache.user(7, load).username == "user1"
+    assert cache.user(7, load).username == "user1"
+    cache.invalidate_user(7)
+    assert cache.user(7, load).username == "user2"
+    assert loads == [7, 7]
+
+
+def test_username_update_is_visible_on_next_me(client):
+    assert client.get("/api/me").json()["username"] == "budi"
+    assert client.put("/api/user/username", json={"username": "budi santoso"}).status_code == 200
+    assert client.get("/api/me").json()["username"] == "budi santoso"
+
+
+def test_google_link_invalidates_cached_user(client, db, user):
+    assert client.get("/api/me").json()["google_id"] is None
+
+    _find_or_create_user(db, "google-123", user.email, "Budi G")
+
+    me = client.get("/api/me").json()
+    assert me["google_id"] == "google-123"
+    assert me["username"] == "Budi G"
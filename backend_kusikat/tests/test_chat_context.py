@@ -0,0 +1,69 @@
+import asyncio
+
+from app.models import ChatHistory, ChatHistoryDeletion
+from app.utils.chat_context import ChatContextBuilder, estimate_tokens
+
+
+def _seed(db, user_id, count):
+    rows = [
+        ChatHistory(user_id=user_id, message_type="text", sender="user" if i % 2 == 0 else "bot",
+                    content=f"pesan nomor {i}")
+        for i in range(count)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _summarize_all(builder, db, user_id):
+    """Jalankan build + refresh sampai tidak ada lagi giliran pending."""
+    summarized = []
+
+    async def summarize(prompt):
+        summarized.extend(line for line in prompt.splitlines() if line.startswith(("Pengguna:", "JUNBOT:")))
+        return "ringkasan"
+
+    for _ in range(20):
+        context = builder.build(db, user_id)
+        if not context.pending:
+            return context, summarized
+        asyncio.run(builder.refresh_summary(user_id, context, summarize))
+    raise AssertionError("ringkasan tidak pernah selesai")
+
+
+def test_turns_beyond_window_are_summarized_in_chunks(db):
+    ids = _seed(db, 1, 150)
+    builder = ChatContextBuilder(budget=10_000, max_turns=40, min_summary_turns=6, summary_chunk=50)
+
+    context, summarized = _summarize_all(builder, db, 1)
+
+    # Semua giliran di luar jendela terakhir tercakup ringkasan, masing-masing sekali
+    assert summarized == [f"{'Pengguna' if i % 2 == 0 else 'JUNBOT'}: pesan nomor {i}" for i in range(110)]
+    assert builder._summaries[1].upto_id == ids[109]
+    assert context.summary == "ringkasan"
+    assert context.turns[0] == "Pengguna: pesan nomor 110"
+    assert len(context.turns) == 40
+
+
+def test_budget_overflow_goes_to_pending(db):
+    _seed(db, 1, 20)
+    budget = 5 * (estimate_tokens("Pengguna: pesan nomor 10") + 1)
+    builder = ChatContextBuilder(budget=budget, max_turns=40, min_summary_turns=6)
+
+    context = builder.build(db, 1)
+    assert len(context.turns) == 5
+    assert context.turns[-1] == "JUNBOT: pesan nomor 19"
+    assert [row.content for row in context.pending] == [f"pesan nomor {i}" for i in range(15)]
+
+
+def test_summary_dropped_after_history_deletion(db):
+    ids = _seed(db, 1, 60)
+    builder = ChatContextBuilder(budget=10_000, max_turns=40, min_summary_turns=6)
+    _summarize_all(builder, db, 1)
+    assert 1 in builder._summaries
+
+    db.add(ChatHistoryDeletion(user_id=1, max_id=ids[-1], status="done"))
+    db.commit()
+    context = builder.build(db, 1)
+    assert context.summary is None
+    assert context.turns == []
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.auth.auth_cache import auth_cache
+from app.auth.jwt_handler import create_access_token
+from app.models import ChatHistory, User
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(main, "CHAT_DELETE_CHUNK_SIZE", 3)
+    monkeypatch.setattr(main, "CHAT_DELETE_CHUNK_PAUSE", 0)
+    users = [User(username="budi", email="budi@example.com"), User(username="ani", email="ani@example.com")]
+    db.add_all(users)
+    db.commit()
+    for user in users:
+        auth_cache.invalidate_user(user.id)
+    client = TestClient(main.app)
+    client.headers["Authorization"] = "Bearer " + create_access_token({"sub": "budi", "id": users[0].id})
+    client.users = users
+    return client
+
+
+def _seed(db, user_id, count, prefix="pesan"):
+    db.add_all([
+        ChatHistory(user_id=user_id, message_type="text", sender="user", content=f"{prefix} {i}")
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def _wait_for_purge():
+    # Executor hapus hanya punya satu worker: job berikutnya jalan setelah purge selesai
+    main.chat_cleanup_executor.submit(lambda: None).result(timeout=10)
+
+
+def test_keyset_pages_cover_whole_history(client, db):
+    _seed(db, client.users[0].id, 7)
+    first = client.get("/api/chat-history", params={"limit": 3}).json()
+    assert [m["content"] for m in first] == ["pesan 4", "pesan 5", "pesan 6"]
+
+    seen = [m["content"] for m in first]
+    before_id = first[0]["id"]
+    while True:
+        page = client.get("/api/chat-history", params={"limit": 3, "before_id": before_id}).json()
+        if not page:
+            break
+        seen = [m["content"] for m in page] + seen
+        before_id = page[0]["id"]
+    assert seen == [f"pesan {i}" for i in range(7)]
+
+
+def test_delete_hides_immediately_and_purges_in_chunks(client, db):
+    me, other = client.users
+    _seed(db, me.id, 10)
+    _seed(db, other.id, 2)
+
+    response = client.delete("/api/chat-history")
+    assert response.status_code == 202
+    # Tombstone: riwayat langsung tidak terlihat walau purge belum selesai
+    assert client.get("/api/chat-history").json() == []
+
+    # Pesan baru setelah hapus tetap terlihat dan tidak ikut terhapus
+    _seed(db, me.id, 1, prefix="baru")
+    _wait_for_purge()
+
+    status = client.get("/api/chat-history/deletion-status").json()
+    assert status["status"] == "done"
+    assert status["deleted"] == 10
+    assert [m["content"] for m in client.get("/api/chat-history").json()] == ["baru 0"]
+    db.expire_all()
+    assert db.query(ChatHistory).filter(ChatHistory.user_id == other.id).count() == 2
+    assert db.query(ChatHistory).filter(ChatHistory.user_id == me.id).count() == 1
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.models import ChatHistory
+from app.utils import chat_search
+
+
+@pytest.fixture
+def fts(db, monkeypatch):
+    db.execute(text("DROP TABLE IF EXISTS chat_search_fts"))
+    db.commit()
+    monkeypatch.setattr(chat_search, "_backend", chat_search._backend)
+    assert chat_search.init_chat_search(engine) == "sqlite_fts5"
+    return db
+
+
+def _add(db, user_id, content):
+    row = ChatHistory(user_id=user_id, message_type="text", sender="user", content=content)
+    db.add(row)
+    db.flush()
+    chat_search.index_messages(db, [row])
+    db.commit()
+    return row.id
+
+
+def test_search_is_scoped_to_user_and_ranked(fts):
+    mine = _add(fts, 1, "resep tumis bayam bawang putih")
+    other = _add(fts, 1, "cara menyimpan wortel")
+    _add(fts, 2, "tumis bayam pedas")
+
+    hits = chat_search.search_messages(fts, 1, "tumis bayam")
+    assert [mid for mid, _ in hits] == [mine]
+    assert [mid for mid, _ in chat_search.search_messages(fts, 1, "wort")] == [other]
+
+
+def test_min_id_and_remove_use_message_ids(fts):
+    first = _add(fts, 1, "sup bayam")
+    second = _add(fts, 1, "sup bayam jagung")
+
+    assert [mid for mid, _ in chat_search.search_messages(fts, 1, "sup", min_id=first)] == [second]
+
+    chat_search.remove_messages(fts, [first, second])
+    fts.commit()
+    assert chat_search.search_messages(fts, 1, "sup") == []
+
+
+def test_old_schema_is_rebuilt_with_backfill(db, monkeypatch):
+    db.execute(text("DROP TABLE IF EXISTS chat_search_fts"))
+    db.execute(text("CREATE VIRTUAL TABLE chat_search_fts USING fts5(body, user_id UNINDEXED, message_id UNINDEXED)"))
+    row = ChatHistory(user_id=3, message_type="text", sender="user", content="pepes tahu")
+    db.add(row)
+    db.commit()
+
+    monkeypatch.setattr(chat_search, "_backend", chat_search._backend)
+    chat_search.init_chat_search(engine)
+    assert [mid for mid, _ in chat_search.search_messages(db, 3, "pepes")] == [row.id]
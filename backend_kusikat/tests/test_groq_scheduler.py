@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.groq_scheduler import (
+    GroqOverloaded, GroqScheduler, PRIORITY_BACKGROUND, PRIORITY_CHAT, PRIORITY_RECIPE, parse_retry_after
+)
+
+
+def test_concurrency_cap_and_priority_order():
+    scheduler = GroqScheduler(max_concurrency=1, max_queue_wait=5)
+    order = []
+
+    async def job(name, priority, hold=0.01):
+        async with scheduler.slot(priority):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        first = asyncio.ensure_future(job("first", PRIORITY_CHAT, hold=0.05))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.ensure_future(job("background", PRIORITY_BACKGROUND)),
+            asyncio.ensure_future(job("chat", PRIORITY_CHAT)),
+            asyncio.ensure_future(job("recipe", PRIORITY_RECIPE)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["active"] == 1
+        assert scheduler.stats()["queue_depth"] == 3
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(main())
+    assert order == ["first", "recipe", "chat", "background"]
+    assert scheduler.stats()["active"] == 0
+
+
+def test_admission_rejects_when_estimated_wait_exceeds_deadline():
+    scheduler = GroqScheduler(max_concurrency=1, max_queue_wait=0.5)
+    scheduler._service_ewma = 2.0
+
+    async def main():
+        async with scheduler.slot():
+            with pytest.raises(GroqOverloaded) as exc:
+                async with scheduler.slot():
+                    pass
+            return exc.value
+
+    error = asyncio.run(main())
+    assert error.status_code == 503
+    assert int(error.headers["Retry-After"]) >= 1
+    assert scheduler.stats()["active"] == 0
+
+
+def test_queue_deadline_turns_into_503_without_leaking_slot():
+    scheduler = GroqScheduler(max_concurrency=1, max_queue_wait=5)
+    scheduler._service_ewma = 0.0  # lolos admission, lalu habis waktu di antrean
+
+    async def main():
+        async with scheduler.slot():
+            with pytest.raises(GroqOverloaded):
+                async with scheduler.slot(deadline=time.monotonic() + 0.02):
+                    pass
+        async with scheduler.slot():
+            pass
+
+    asyncio.run(main())
+    assert scheduler.stats()["active"] == 0
+
+
+@pytest.mark.parametrize("cancel_after_grant", [False, True])
+def test_cancelled_waiter_does_not_leak_slot(cancel_after_grant):
+    scheduler = GroqScheduler(max_concurrency=1, max_queue_wait=5)
+
+    async def holder_then_release(waiter):
+        await scheduler._acquire(PRIORITY_CHAT, time.monotonic() + 5)
+        await asyncio.sleep(0)
+        if cancel_after_grant:
+            # _dispatch memberi slot ke waiter, lalu waiter dibatalkan sebelum lanjut
+            scheduler._release(0.1)
+            waiter.cancel()
+        else:
+            waiter.cancel()
+            await asyncio.sleep(0)
+            scheduler._release(0.1)
+
+    async def waiter_body():
+        async with scheduler.slot():
+            pass
+
+    async def main():
+        await scheduler._acquire(PRIORITY_CHAT, time.monotonic() + 5)
+        scheduler._release(0.1)
+        waiter = asyncio.ensure_future(waiter_body())
+        holder = asyncio.ensure_future(holder_then_release(waiter))
+        await holder
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
+    assert scheduler.stats()["active"] == 0
+
+
+def test_rate_limit_cooldown_delays_dispatch():
+    scheduler = GroqScheduler(max_concurrency=2, max_queue_wait=5)
+    assert scheduler.note_rate_limited("0.05", attempt=0) == 0.05
+
+    async def main():
+        started = time.monotonic()
+        async with scheduler.slot():
+            return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.04
+    assert scheduler.stats()["rate_limited"] == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("bukan tanggal") is None
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
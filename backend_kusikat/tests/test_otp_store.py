@@ -0,0 +1,51 @@
+import pytest
+
+from app.utils import otp_store
+from app.utils.otp_store import MemoryOtpStore, SqlOtpStore
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, db):
+    if request.param == "memory":
+        return MemoryOtpStore(max_attempts=3)
+    return SqlOtpStore(max_attempts=3, sweep_interval=0)
+
+
+def test_otp_is_single_use(store):
+    store.put("6281234", "123456", ttl=60)
+    assert store.verify("6281234", "123456")
+    assert not store.verify("6281234", "123456")
+    assert store.stats()["verified"] == 1
+
+
+def test_wrong_attempts_lock_out_otp(store):
+    store.put("6281234", "123456", ttl=60)
+    for _ in range(3):
+        assert not store.verify("6281234", "000000")
+    # Kode benar pun ditolak setelah batas percobaan
+    assert not store.verify("6281234", "123456")
+    assert store.stats()["locked_out"] == 1
+
+
+def test_new_otp_replaces_old_one(store):
+    store.put("6281234", "111111", ttl=60)
+    store.put("6281234", "222222", ttl=60)
+    assert not store.verify("6281234", "111111")
+    assert store.verify("6281234", "222222")
+
+
+def test_expired_otp_is_rejected(store):
+    store.put("6281234", "123456", ttl=-1)
+    assert not store.verify("6281234", "123456")
+
+
+def test_memory_store_sweeps_expired_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(otp_store.time, "monotonic", lambda: now[0])
+    store = MemoryOtpStore()
+    for i in range(5):
+        store.put(f"62{i}", "123456", ttl=10)
+    now[0] += 11
+    store.put("62new", "654321", ttl=10)
+    assert store.stats()["active"] == 1
+    assert store.stats()["expired"] == 5
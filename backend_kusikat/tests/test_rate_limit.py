@@ -0,0 +1,87 @@
+import threading
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import rate_limit
+from app.utils.rate_limit import Limit, RateLimiter, ShardedMemoryBackend
+
+
+def _client(limiter):
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(limiter.dependency("login"))])
+    def login(body: dict):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_bucket_refills_lazily(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    backend = ShardedMemoryBackend(shards=2)
+    limit = Limit.parse("2/10")
+
+    assert backend.take("k", limit) == (True, 0.0)
+    assert backend.take("k", limit) == (True, 0.0)
+    ok, retry_after = backend.take("k", limit)
+    assert not ok and retry_after == 5.0
+
+    now[0] += 5
+    assert backend.take("k", limit)[0]
+
+
+def test_concurrent_takes_never_exceed_burst():
+    backend = ShardedMemoryBackend(shards=4)
+    limit = Limit(50, 3600)
+    allowed = []
+
+    def worker():
+        for _ in range(100):
+            allowed.append(backend.take("shared", limit)[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(allowed) == 50
+
+
+def test_lru_eviction_bounds_memory():
+    backend = ShardedMemoryBackend(shards=1, max_keys=3)
+    for i in range(10):
+        backend.take(f"k{i}", Limit(1, 60))
+    assert backend.stats()["buckets"] == 3
+    assert backend.stats()["evicted"] == 7
+
+
+def test_identity_limit_returns_429_with_retry_after():
+    limiter = RateLimiter(enabled=True)
+    limiter.policies["login"] = [("ip", Limit(100, 60)), ("username", Limit(2, 60))]
+    client = _client(limiter)
+
+    assert client.post("/login", json={"username": "Budi"}).status_code == 200
+    assert client.post("/login", json={"username": "budi "}).status_code == 200
+    blocked = client.post("/login", json={"username": "BUDI"})
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+    # User lain dari IP yang sama masih boleh
+    assert client.post("/login", json={"username": "ani"}).status_code == 200
+    assert limiter.stats()["rejected"] == {"login:username": 1}
+
+
+def test_custom_backend_is_duck_typed():
+    class DenyAll:
+        def take(self, key, limit):
+            return False, 3.0
+
+        def stats(self):
+            return {"name": "deny"}
+
+    limiter = RateLimiter(backend=DenyAll(), enabled=True)
+    response = _client(limiter).post("/login", json={"username": "budi"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert limiter.stats()["backend"] == {"name": "deny"}
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import httpx
+
+from app.routes import ai
+from app.utils.recipe_stream import IncrementalRecipeParser
+
+RECIPE = {
+    "recipe_name": "Tumis \"Bayam\" Bawang",
+    "ingredients": ["1 ikat bayam", "3 siung bawang, iris"],
+    "steps": ["Panaskan minyak", "Tumis {bawang} lalu masukkan bayam"],
+    "estimated_time": "10 menit",
+}
+
+
+def _feed_in_pieces(text, size):
+    parser = IncrementalRecipeParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+def test_parser_emits_each_part_once_regardless_of_chunking():
+    text = "Berikut resepnya:\n" + json.dumps(RECIPE, ensure_ascii=False) + "\nSelamat memasak!"
+    expected = [
+        ("recipe_name", RECIPE["recipe_name"]),
+        ("ingredient", "1 ikat bayam"),
+        ("ingredient", "3 siung bawang, iris"),
+        ("step", "Panaskan minyak"),
+        ("step", "Tumis {bawang} lalu masukkan bayam"),
+    ]
+    for size in (1, 3, 7, len(text)):
+        parser, events = _feed_in_pieces(text, size)
+        assert events == expected
+        assert parser.done
+
+
+def test_parser_ignores_unknown_nested_strings():
+    text = '{"meta": {"recipe_name": "bukan"}, "tags": ["x"], "steps": ["ok"]}'
+    assert _feed_in_pieces(text, 2)[1] == [("step", "ok")]
+
+
+def test_stream_groq_parses_sse_chunks(monkeypatch):
+    def sse(token):
+        return "data: " + json.dumps({"choices": [{"delta": {"content": token}}]}) + "\n\n"
+
+    body = ": keep-alive\n\n" + sse("Halo") + sse(" dunia") + sse("") + "data: [DONE]\n\n" + sse("terlambat")
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(ai, "get_groq_client", lambda: client)
+        monkeypatch.setattr(ai, "GROQ_API_KEY", "test-key")
+        try:
+            return [token async for token in ai.stream_groq("halo")]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ["Halo", " dunia"]
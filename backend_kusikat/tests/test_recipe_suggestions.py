@@ -0,0 +1,44 @@
+import asyncio
+
+from app.utils.recipe_suggestions import RecipeSuggestionCache
+
+
+def test_transition_during_pending_precompute_is_rerun():
+    ran = []
+
+    def job(status):
+        async def run():
+            await asyncio.sleep(0.01)
+            ran.append(status)
+            return 1
+        return run
+
+    async def main():
+        cache = RecipeSuggestionCache()
+        cache.bind_loop(asyncio.get_running_loop())
+
+        def from_sensor_thread():
+            assert cache.submit(1, job("mulai_layu"))
+            assert cache.submit(1, job("segar"))
+            assert cache.submit(1, job("hampir_busuk"))
+
+        await asyncio.to_thread(from_sensor_thread)
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if not cache.stats()["containers_pending"]:
+                break
+        return cache.stats()
+
+    stats = asyncio.run(main())
+    # Job yang menunggu digantikan status terbaru
+    assert ran == ["mulai_layu", "hampir_busuk"]
+    assert stats["containers_pending"] == 0
+    assert stats["containers_dirty"] == 0
+    assert stats["precomputed"] == 2
+
+
+def test_suggestion_only_served_for_matching_status():
+    cache = RecipeSuggestionCache()
+    cache.put(1, "Bayam", "mulai_layu", {"recipe_name": "Tumis"})
+    assert cache.get(1, "bayam", "mulai layu") == {"recipe_name": "Tumis"}
+    assert cache.get(1, "bayam", "hampir busuk") is None
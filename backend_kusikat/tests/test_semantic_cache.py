@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.routes import ai
+from app.schemas import ChatRequest
+from app.utils.semantic_cache import SemanticCache
+
+# Bentuk request yang dikirim food.jsx (handleSend) ke /api/ai/chat
+TIME_CONTEXT = "Saat ini jam 08.15.00, waktu pagi di Indonesia."
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SemanticCache(capacity=16)
+    monkeypatch.setattr(ai, "semantic_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def groq_calls(monkeypatch):
+    prompts = []
+
+    async def fake_call_groq(prompt, priority=ai.PRIORITY_CHAT):
+        prompts.append(prompt)
+        return "Simpan bayam di kulkas dalam wadah tertutup."
+
+    monkeypatch.setattr(ai, "call_groq", fake_call_groq)
+    return prompts
+
+
+def test_similar_question_with_time_context_hits(cache, groq_calls):
+    first = ChatRequest(message="Bagaimana cara menyimpan bayam agar tahan lama?", time_context=TIME_CONTEXT)
+    second = ChatRequest(message="gimana cara nyimpen bayam biar awet", time_context=TIME_CONTEXT)
+
+    asyncio.run(ai.chat_with_ai(first, authorization=None))
+    reply = asyncio.run(ai.chat_with_ai(second, authorization=None))
+
+    assert len(groq_calls) == 1
+    assert reply.reply == "Simpan bayam di kulkas dalam wadah tertutup."
+    assert cache.hits == 1
+
+
+def test_shareable_prompt_omits_time_context(groq_calls, cache):
+    asyncio.run(ai.chat_with_ai(
+        ChatRequest(message="Bagaimana cara menyimpan bayam agar tahan lama?", time_context=TIME_CONTEXT),
+        authorization=None,
+    ))
+    assert TIME_CONTEXT not in groq_calls[0]
+
+
+def test_time_sensitive_question_keeps_time_context_and_skips_cache(groq_calls, cache):
+    request = ChatRequest(message="Menu sarapan apa yang cocok hari ini?", time_context=TIME_CONTEXT)
+    asyncio.run(ai.chat_with_ai(request, authorization=None))
+    asyncio.run(ai.chat_with_ai(request, authorization=None))
+
+    assert len(groq_calls) == 2
+    assert TIME_CONTEXT in groq_calls[0]
+    assert len(cache._slots) == 0
+
+
+def test_private_context_is_not_stored(monkeypatch, groq_calls, cache):
+    class Context:
+        def render(self):
+            return "Percakapan terakhir:\nPengguna: aku alergi kacang"
+
+    async def fake_context(user_id):
+        return Context()
+
+    monkeypatch.setattr(ai, "get_chat_context", fake_context)
+    asyncio.run(ai.chat_with_ai(
+        ChatRequest(message="Bagaimana cara menyimpan bayam agar tahan lama?"), authorization=None
+    ))
+    assert len(cache._slots) == 0
+
+
+def test_name_placeholder_matches_whole_words_only():
+    cache = SemanticCache(capacity=4)
+    cache.put("cara menyimpan bayam tahan lama", "Halo Ani, simpan bayam di kulkas Anita.", "Ani")
+    assert cache.get("cara menyimpan bayam tahan lama", "Budi") == "Halo Budi, simpan bayam di kulkas Anita."
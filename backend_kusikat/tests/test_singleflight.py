@@ -0,0 +1,87 @@
+import asyncio
+
+from app.routes import ai
+from app.schemas import RecipeRequest
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "hasil"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", upstream) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["hasil"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight("test")
+
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 42
+
+
+def test_groq_calls_of_different_priority_do_not_coalesce(monkeypatch):
+    priorities = []
+
+    async def fake_upstream(prompt, priority):
+        priorities.append(priority)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    monkeypatch.setattr(ai, "_call_groq_upstream", fake_upstream)
+
+    async def main():
+        await asyncio.gather(
+            ai.call_groq("prompt sama", ai.PRIORITY_BACKGROUND),
+            ai.call_groq("prompt sama", ai.PRIORITY_RECIPE),
+            ai.call_groq("prompt sama", ai.PRIORITY_RECIPE),
+        )
+
+    asyncio.run(main())
+    assert sorted(priorities) == sorted([ai.PRIORITY_BACKGROUND, ai.PRIORITY_RECIPE])
+
+
+def test_user_recipe_does_not_join_background_precompute(monkeypatch):
+    priorities = []
+
+    async def fake_call_groq(prompt, priority=ai.PRIORITY_CHAT):
+        priorities.append(priority)
+        await asyncio.sleep(0.01)
+        return (
+            '{"recipe_name": "Tumis Bayam", "ingredients": ["bayam"], '
+            '"steps": ["tumis"], "estimated_time": "10 menit"}'
+        )
+
+    monkeypatch.setattr(ai, "call_groq", fake_call_groq)
+    monkeypatch.setattr(ai.recipe_cache, "get", lambda key: None)
+    request = RecipeRequest(food_item="Bayam", freshness_status="mulai layu",
+                            temperature=5.0, humidity=80.0, voc=100.0)
+
+    async def main():
+        await asyncio.gather(
+            ai.generate_recipe_data(request, "Pengguna", priority=ai.PRIORITY_BACKGROUND, use_cache=False),
+            ai.generate_recipe_data(request, "Pengguna", use_cache=False),
+        )
+
+    asyncio.run(main())
+    assert sorted(priorities) == sorted([ai.PRIORITY_BACKGROUND, ai.PRIORITY_RECIPE])
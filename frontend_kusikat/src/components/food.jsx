@@ -47,6 +47,21 @@ const normalizeStatus = (status) => {
   return status;
 };
 
+// Sama dengan CHAT_HISTORY_PAGE_SIZE di backend (default /api/chat-history)
+const CHAT_PAGE_SIZE = 50;
+
+const fromChatRow = (msg) => ({
+  id: msg.id,
+  type: msg.message_type,
+  sender: msg.sender,
+  content: msg.content,
+  recipe_name: msg.recipe_name,
+  ingredients: msg.ingredients || [],
+  steps: msg.steps || [],
+  created_at: msg.created_at,
+  emoji: "🧑‍🍳"
+});
+
 const formatTime = (date) => {
   return new Date(date).toLocaleTimeString('id-ID', { hour: '2-digit', minute: '2-digit' });
 };
@@ -63,6 +78,12 @@ function Food() {
   });
 
   const [chatMessages, setChatMessages] = useState([]);
+  // Halaman lama yang dimuat lewat "Muat pesan sebelumnya" (before_id)
+  const [olderMessages, setOlderMessages] = useState([]);
+  const [hasMoreHistory, setHasMoreHistory] = useState(false);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const latestPageRef = useRef([]);
+  const hasLoadedOlder = useRef(false);
   const [userInput, setUserInput] = useState("");
   const messagesEndRef = useRef(null);
   const hasInitializedChat = useRef(false);
@@ -99,29 +120,31 @@ function Food() {
     }
   };
 
-  const saveMessageToBackend = async (message, headers) => {
+  const toChatPayload = (message) => ({
+    message_type: message.type,
+    sender: message.sender,
+    content: message.content || null,
+    recipe_name: message.recipe_name || null,
+    ingredients: message.ingredients || null,
+    steps: message.steps || null
+  });
+
+  // Simpan satu percakapan (pesan user + balasan bot) dalam satu request
+  const saveMessagesToBackend = async (messages, headers) => {
     try {
-      const payload = {
-        message_type: message.type,
-        sender: message.sender,
-        content: message.content || null,
-        recipe_name: message.recipe_name || null,
-        ingredients: message.ingredients || null,
-        steps: message.steps || null
-      };
-      const res = await fetch("http://localhost:8000/api/chat-history", {
+      const res = await fetch("http://localhost:8000/api/chat-history/bulk", {
         method: "POST",
         headers: { "Content-Type": "application/json", ...headers },
-        body: JSON.stringify(payload)
+        body: JSON.stringify({ messages: messages.map(toChatPayload) })
       });
       if (res.ok) {
         const saved = await res.json();
-        return saved.created_at;
+        return saved.ids;
       }
     } catch (err) {
       console.error("Gagal menyimpan pesan ke backend:", err);
     }
-    return new Date().toISOString();
+    return [];
   };
 
   const fetchData = async () => {
@@ -157,17 +180,17 @@ function Food() {
       let initialChat = [];
       if (chatRes.ok) {
         const saved = await chatRes.json();
-        initialChat = saved.map(msg => ({
-          id: msg.id,
-          type: msg.message_type,
-          sender: msg.sender,
-          content: msg.content,
-          recipe_name: msg.recipe_name,
-          ingredients: msg.ingredients || [],
-          steps: msg.steps || [],
-          created_at: msg.created_at,
-          emoji: "🧑‍🍳"
-        }));
+        initialChat = saved.map(fromChatRow);
+
+        // Pesan yang tergeser keluar dari halaman terbaru pindah ke halaman lama,
+        // supaya tidak ada celah setelah user memuat pesan sebelumnya
+        const firstId = initialChat[0]?.id;
+        const slid = latestPageRef.current.filter(m => m.id && firstId && m.id < firstId);
+        if (hasLoadedOlder.current && slid.length) {
+          setOlderMessages(prev => [...prev, ...slid.filter(m => !prev.some(o => o.id === m.id))]);
+        }
+        latestPageRef.current = initialChat;
+        if (!hasLoadedOlder.current) setHasMoreHistory(initialChat.length >= CHAT_PAGE_SIZE);
       }
 
       if (!hasInitializedChat.current && initialChat.length === 0) {
@@ -182,12 +205,12 @@ function Food() {
         const botGreeting1 = { type: "text", sender: "bot", content: `${greeting} 👋 Saya **Chef Sayuran**, asisten masak pintar Anda.` };
         const botGreeting2 = { type: "text", sender: "bot", content: `🔍 ${recommendation} • Diperkirakan layu dalam: ${daysDisplay}.` };
 
-        const time1 = await saveMessageToBackend(botGreeting1, headers);
-        const time2 = await saveMessageToBackend(botGreeting2, headers);
+        const createdAt = new Date().toISOString();
+        await saveMessagesToBackend([botGreeting1, botGreeting2], headers);
 
         setChatMessages([
-          { ...botGreeting1, created_at: time1 },
-          { ...botGreeting2, created_at: time2 }
+          { ...botGreeting1, created_at: createdAt },
+          { ...botGreeting2, created_at: createdAt }
         ]);
         hasInitializedChat.current = true;
       } else {
@@ -210,6 +233,32 @@ function Food() {
     };
   }, []);
 
+  const loadOlderMessages = async () => {
+    const oldest = olderMessages[0] || chatMessages.find(m => m.id);
+    if (!oldest?.id || isLoadingOlder) return;
+
+    const token = localStorage.getItem("access_token");
+    const headers = token ? { Authorization: `Bearer ${token}` } : {};
+
+    setIsLoadingOlder(true);
+    try {
+      const res = await fetch(
+        `http://localhost:8000/api/chat-history?before_id=${oldest.id}&limit=${CHAT_PAGE_SIZE}`,
+        { headers }
+      );
+      if (res.ok) {
+        const page = (await res.json()).map(fromChatRow);
+        hasLoadedOlder.current = true;
+        setOlderMessages(prev => [...page, ...prev]);
+        setHasMoreHistory(page.length >= CHAT_PAGE_SIZE);
+      }
+    } catch (err) {
+      console.error("Gagal memuat pesan sebelumnya:", err);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   const handleSend = async () => {
     if (!userInput.trim()) return;
 
@@ -224,8 +273,6 @@ function Food() {
       ...(token ? { Authorization: `Bearer ${token}` } : {})
     };
 
-    const userTime = await saveMessageToBackend(userMsg, headers);
-
     try {
       const isRecipe = /resep|masak|olah|tumis|cepat saji|menu/i.test(userMsg.content);
 
@@ -260,12 +307,12 @@ function Food() {
             created_at: botTime
           };
           setChatMessages(prev => [...prev, recipeMsg]);
-          await saveMessageToBackend(recipeMsg, headers);
+          await saveMessagesToBackend([userMsg, recipeMsg], headers);
         } else {
           const botTime = new Date().toISOString();
           const errorMsg = { type: "text", sender: "bot", content: "Maaf, saya kesulitan membuat resep saat ini 😓", created_at: botTime };
           setChatMessages(prev => [...prev, errorMsg]);
-          await saveMessageToBackend(errorMsg, headers);
+          await saveMessagesToBackend([userMsg, errorMsg], headers);
         }
       } else {
         const now = new Date();
@@ -293,12 +340,12 @@ function Food() {
           const botTime = new Date().toISOString();
           const replyMsg = { type: "text", sender: "bot", content: data.reply || "Maaf, saya tidak mengerti.", created_at: botTime };
           setChatMessages(prev => [...prev, replyMsg]);
-          await saveMessageToBackend(replyMsg, headers);
+          await saveMessagesToBackend([userMsg, replyMsg], headers);
         } else {
           const botTime = new Date().toISOString();
           const errorMsg = { type: "text", sender: "bot", content: "Maaf, saya sedang offline. Coba lagi nanti.", created_at: botTime };
           setChatMessages(prev => [...prev, errorMsg]);
-          await saveMessageToBackend(errorMsg, headers);
+          await saveMessagesToBackend([userMsg, errorMsg], headers);
         }
       }
     } catch (err) {
@@ -306,7 +353,7 @@ function Food() {
       const botTime = new Date().toISOString();
       const errorMsg = { type: "text", sender: "bot", content: "Koneksi gagal. Periksa internet Anda.", created_at: botTime };
       setChatMessages(prev => [...prev.slice(0, -1), errorMsg]);
-      await saveMessageToBackend(errorMsg, headers);
+      await saveMessagesToBackend([userMsg, errorMsg], headers);
     }
   };
 
@@ -325,6 +372,10 @@ function Food() {
         headers
       });
       setChatMessages([]);
+      setOlderMessages([]);
+      setHasMoreHistory(false);
+      latestPageRef.current = [];
+      hasLoadedOlder.current = false;
       setShowConfirmModal(false);
     } catch (err) {
       console.error("Gagal menghapus riwayat:", err);
@@ -447,10 +498,21 @@ function Food() {
               </div>
 
               <div className="bg-gray-50 rounded-2xl p-4 border border-gray-200 h-96 overflow-y-auto mb-4">
-                {chatMessages.length === 0 ? (
+                {hasMoreHistory && (
+                  <div className="text-center mb-4">
+                    <button
+                      onClick={loadOlderMessages}
+                      disabled={isLoadingOlder}
+                      className="text-xs text-emerald-700 hover:text-emerald-900 disabled:text-gray-400"
+                    >
+                      {isLoadingOlder ? "Memuat..." : "Muat pesan sebelumnya"}
+                    </button>
+                  </div>
+                )}
+                {chatMessages.length === 0 && olderMessages.length === 0 ? (
                   <p className="text-sm text-gray-500 text-center py-8">Belum ada percakapan.</p>
                 ) : (
-                  chatMessages.map((msg, index) => (
+                  [...olderMessages, ...chatMessages].map((msg, index) => (
                     <div key={msg.id || index} className={`flex ${msg.sender === "user" ? "justify-end" : "justify-start"} mb-4`}>
                       {msg.sender === "bot" ? (
                         <div className="max-w-[85%]">